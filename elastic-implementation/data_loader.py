@@ -1,248 +1,365 @@
-from elasticsearch import Elasticsearch
+from elasticsearch.helpers import parallel_bulk
+from es_client import bump_index_version, get_client
 import logging
 from typing import List, Dict
-from datetime import datetime
+import time
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Applications configure handlers; the module stays silent by default
+logger.addHandler(logging.NullHandler())
 
-class ExtensiveEquipmentDataLoader:
-    def __init__(self, host: str = "http://localhost:9200"):
-        self.es = Elasticsearch([host])
-        self.internal_index = "internal_equipment"
-        self.partner_index = "partner_equipment"
+# Bulk indexing concurrency; must not exceed es_client.POOL_MAXSIZE
+BULK_THREAD_COUNT = 12
+BULK_CHUNK_SIZE = 200
 
-    def get_internal_equipment(self) -> List[Dict]:
-        """Generate extensive internal equipment data"""
-        return [
-            # Pumps
-            {
-                "name": "High-Flow Process Pump",
-                "description": "High-capacity centrifugal pump for chemical processing with advanced seal system",
-                "category": "pumps",
-                "subcategory": "centrifugal_pumps",
-                "manufacturer": "Flowserve",
-                "model": "PVXM-5000",
-                "specifications": [
-                    {"parameter": "flow", "value": 5000, "unit": "m3/hr"},
-                    {"parameter": "head", "value": 150, "unit": "m"},
-                    {"parameter": "power", "value": 750, "unit": "kW"},
-                    {"parameter": "efficiency", "value": 85, "unit": "percent"}
-                ],
-                "location": {"country": "USA", "city": "Houston", "availability": "immediate"},
-                "price": {"value": 85000.00, "currency": "USD"},
-                "condition": "new",
-                "certification": ["ATEX", "API-610"],
-                "warranty_period": 24
-            },
-            {
-                "name": "Metering Pump Package",
-                "description": "Precision chemical dosing pump with digital flow control",
-                "category": "pumps",
-                "subcategory": "metering_pumps",
-                "manufacturer": "Milton Roy",
-                "model": "mROY-A",
-                "specifications": [
-                    {"parameter": "flow", "value": 1.5, "unit": "m3/hr"},
-                    {"parameter": "pressure", "value": 70, "unit": "bar"},
-                    {"parameter": "power", "value": 2.2, "unit": "kW"}
-                ],
-                "location": {"country": "USA", "city": "Chicago", "availability": "1-week"},
-                "price": {"value": 12000.00, "currency": "USD"},
-                "condition": "new"
-            },
+# Index settings applied while bulk loading; each index gets its own
+# earlier values back afterwards
+BULK_LOAD_SETTINGS = {
+    "index": {
+        "refresh_interval": "-1",
+        "translog.durability": "async",
+        "translog.flush_threshold_size": "1gb"
+    }
+}
+_BULK_LOAD_SETTING_NAMES = [f"index.{name}" for name in BULK_LOAD_SETTINGS["index"]]
 
-            # Heat Exchangers
-            {
-                "name": "Large Plate Heat Exchanger",
-                "description": "Gasketed plate heat exchanger for industrial process cooling",
-                "category": "heat_exchangers",
-                "subcategory": "plate_type",
-                "manufacturer": "Alfa Laval",
-                "model": "T50",
-                "specifications": [
-                    {"parameter": "heat_transfer_area", "value": 5000, "unit": "m2"},
-                    {"parameter": "temperature", "value": 180, "unit": "C"},
-                    {"parameter": "pressure", "value": 25, "unit": "bar"},
-                    {"parameter": "flow_rate", "value": 1000, "unit": "m3/hr"}
-                ],
-                "location": {"country": "Germany", "city": "Hamburg", "availability": "immediate"},
-                "price": {"value": 120000.00, "currency": "EUR"},
-                "condition": "new"
-            },
+# Explicit equipment mapping. Exact-match attributes are pure keyword fields
+# (no text+keyword duals) and unknown fields are rejected rather than
+# dynamically mapped. Single-valued location attributes are flat keyword
+# fields so filters on them are plain term lookups rather than nested queries.
+EQUIPMENT_MAPPING = {
+    "dynamic": "strict",
+    "properties": {
+        "name": {"type": "text"},
+        "description": {"type": "text"},
+        "category": {"type": "keyword"},
+        "subcategory": {"type": "keyword"},
+        "manufacturer": {"type": "keyword"},
+        "model": {"type": "keyword"},
+        "specifications": {
+            "type": "nested",
+            "properties": {
+                "parameter": {"type": "keyword"},
+                "value": {"type": "float"},
+                "unit": {"type": "keyword"}
+            }
+        },
+        "location_country": {"type": "keyword"},
+        "location_city": {"type": "keyword"},
+        "location_availability": {"type": "keyword"},
+        "price": {
+            "properties": {
+                "value": {"type": "scaled_float", "scaling_factor": 100},
+                "currency": {"type": "keyword"}
+            }
+        },
+        "condition": {"type": "keyword"},
+        "certification": {"type": "keyword"},
+        "warranty_period": {"type": "integer"},
+        "refurbishment_date": {"type": "date"},
+        # Loads write epoch millis, which ES parses far cheaper than ISO-8601
+        "timestamp": {"type": "date", "format": "epoch_millis||strict_date_optional_time"}
+    }
+}
+INDEX_SETTINGS = {"number_of_shards": 1, "refresh_interval": "5s"}
 
-            # Compressors
-            {
-                "name": "Oil-Free Air Compressor",
-                "description": "Class 0 oil-free rotary screw air compressor with integrated dryer",
-                "category": "compressors",
-                "subcategory": "rotary_screw",
-                "manufacturer": "Atlas Copco",
-                "model": "ZR-500-VSD+",
-                "specifications": [
-                    {"parameter": "flow", "value": 3000, "unit": "m3/hr"},
-                    {"parameter": "pressure", "value": 8.5, "unit": "bar"},
-                    {"parameter": "power", "value": 500, "unit": "kW"},
-                    {"parameter": "noise_level", "value": 75, "unit": "dB"}
-                ],
-                "location": {"country": "USA", "city": "Cleveland", "availability": "2-weeks"},
-                "price": {"value": 250000.00, "currency": "USD"},
-                "condition": "new"
-            },
+# Sample equipment catalogues, built once at import
+_INTERNAL_EQUIPMENT = [
+    # Pumps
+    {
+        "name": "High-Flow Process Pump",
+        "description": "High-capacity centrifugal pump for chemical processing with advanced seal system",
+        "category": "pumps",
+        "subcategory": "centrifugal_pumps",
+        "manufacturer": "Flowserve",
+        "model": "PVXM-5000",
+        "specifications": [
+            {"parameter": "flow", "value": 5000, "unit": "m3/hr"},
+            {"parameter": "head", "value": 150, "unit": "m"},
+            {"parameter": "power", "value": 750, "unit": "kW"},
+            {"parameter": "efficiency", "value": 85, "unit": "percent"}
+        ],
+        "location_country": "USA",
+        "location_city": "Houston",
+        "location_availability": "immediate",
+        "price": {"value": 85000.00, "currency": "USD"},
+        "condition": "new",
+        "certification": ["ATEX", "API-610"],
+        "warranty_period": 24
+    },
+    {
+        "name": "Metering Pump Package",
+        "description": "Precision chemical dosing pump with digital flow control",
+        "category": "pumps",
+        "subcategory": "metering_pumps",
+        "manufacturer": "Milton Roy",
+        "model": "mROY-A",
+        "specifications": [
+            {"parameter": "flow", "value": 1.5, "unit": "m3/hr"},
+            {"parameter": "pressure", "value": 70, "unit": "bar"},
+            {"parameter": "power", "value": 2.2, "unit": "kW"}
+        ],
+        "location_country": "USA",
+        "location_city": "Chicago",
+        "location_availability": "1-week",
+        "price": {"value": 12000.00, "currency": "USD"},
+        "condition": "new"
+    },
 
-            # Turbines
-            {
-                "name": "Industrial Steam Turbine",
-                "description": "High-efficiency condensing steam turbine for power generation",
-                "category": "turbines",
-                "subcategory": "steam_turbines",
-                "manufacturer": "General Electric",
-                "model": "D650",
-                "specifications": [
-                    {"parameter": "power_output", "value": 100, "unit": "MW"},
-                    {"parameter": "steam_pressure", "value": 140, "unit": "bar"},
-                    {"parameter": "steam_temperature", "value": 565, "unit": "C"},
-                    {"parameter": "efficiency", "value": 94, "unit": "percent"}
-                ],
-                "location": {"country": "USA", "city": "Schenectady", "availability": "12-weeks"},
-                "price": {"value": 15000000.00, "currency": "USD"},
-                "condition": "new"
-            },
+    # Heat Exchangers
+    {
+        "name": "Large Plate Heat Exchanger",
+        "description": "Gasketed plate heat exchanger for industrial process cooling",
+        "category": "heat_exchangers",
+        "subcategory": "plate_type",
+        "manufacturer": "Alfa Laval",
+        "model": "T50",
+        "specifications": [
+            {"parameter": "heat_transfer_area", "value": 5000, "unit": "m2"},
+            {"parameter": "temperature", "value": 180, "unit": "C"},
+            {"parameter": "pressure", "value": 25, "unit": "bar"},
+            {"parameter": "flow_rate", "value": 1000, "unit": "m3/hr"}
+        ],
+        "location_country": "Germany",
+        "location_city": "Hamburg",
+        "location_availability": "immediate",
+        "price": {"value": 120000.00, "currency": "EUR"},
+        "condition": "new"
+    },
 
-            # Valves
-            {
-                "name": "Control Valve Package",
-                "description": "Digital positioner equipped control valve for precise flow control",
-                "category": "valves",
-                "subcategory": "control_valves",
-                "manufacturer": "Fisher",
-                "model": "GX-3000",
-                "specifications": [
-                    {"parameter": "size", "value": 12, "unit": "inch"},
-                    {"parameter": "pressure_rating", "value": 300, "unit": "psi"},
-                    {"parameter": "cv", "value": 1200, "unit": "gpm"},
-                    {"parameter": "rangeability", "value": 50, "unit": "ratio"}
-                ],
-                "location": {"country": "USA", "city": "Houston", "availability": "immediate"},
-                "price": {"value": 35000.00, "currency": "USD"},
-                "condition": "new"
-            }
-        ]
+    # Compressors
+    {
+        "name": "Oil-Free Air Compressor",
+        "description": "Class 0 oil-free rotary screw air compressor with integrated dryer",
+        "category": "compressors",
+        "subcategory": "rotary_screw",
+        "manufacturer": "Atlas Copco",
+        "model": "ZR-500-VSD+",
+        "specifications": [
+            {"parameter": "flow", "value": 3000, "unit": "m3/hr"},
+            {"parameter": "pressure", "value": 8.5, "unit": "bar"},
+            {"parameter": "power", "value": 500, "unit": "kW"},
+            {"parameter": "noise_level", "value": 75, "unit": "dB"}
+        ],
+        "location_country": "USA",
+        "location_city": "Cleveland",
+        "location_availability": "2-weeks",
+        "price": {"value": 250000.00, "currency": "USD"},
+        "condition": "new"
+    },
 
-    def get_partner_equipment(self) -> List[Dict]:
-        """Generate extensive partner equipment data"""
-        return [
-            # Pumps
-            {
-                "name": "Multistage Process Pump",
-                "description": "High-pressure multistage centrifugal pump for water injection",
-                "category": "pumps",
-                "subcategory": "multistage_pumps",
-                "manufacturer": "Sulzer",
-                "model": "MSD-RO",
-                "specifications": [
-                    {"parameter": "flow", "value": 800, "unit": "m3/hr"},
-                    {"parameter": "head", "value": 1500, "unit": "m"},
-                    {"parameter": "power", "value": 1200, "unit": "kW"},
-                    {"parameter": "efficiency", "value": 83, "unit": "percent"}
-                ],
-                "location": {"country": "Switzerland", "city": "Winterthur", "availability": "3-weeks"},
-                "price": {"value": 320000.00, "currency": "CHF"},
-                "condition": "new"
-            },
+    # Turbines
+    {
+        "name": "Industrial Steam Turbine",
+        "description": "High-efficiency condensing steam turbine for power generation",
+        "category": "turbines",
+        "subcategory": "steam_turbines",
+        "manufacturer": "General Electric",
+        "model": "D650",
+        "specifications": [
+            {"parameter": "power_output", "value": 100, "unit": "MW"},
+            {"parameter": "steam_pressure", "value": 140, "unit": "bar"},
+            {"parameter": "steam_temperature", "value": 565, "unit": "C"},
+            {"parameter": "efficiency", "value": 94, "unit": "percent"}
+        ],
+        "location_country": "USA",
+        "location_city": "Schenectady",
+        "location_availability": "12-weeks",
+        "price": {"value": 15000000.00, "currency": "USD"},
+        "condition": "new"
+    },
+
+    # Valves
+    {
+        "name": "Control Valve Package",
+        "description": "Digital positioner equipped control valve for precise flow control",
+        "category": "valves",
+        "subcategory": "control_valves",
+        "manufacturer": "Fisher",
+        "model": "GX-3000",
+        "specifications": [
+            {"parameter": "size", "value": 12, "unit": "inch"},
+            {"parameter": "pressure_rating", "value": 300, "unit": "psi"},
+            {"parameter": "cv", "value": 1200, "unit": "gpm"},
+            {"parameter": "rangeability", "value": 50, "unit": "ratio"}
+        ],
+        "location_country": "USA",
+        "location_city": "Houston",
+        "location_availability": "immediate",
+        "price": {"value": 35000.00, "currency": "USD"},
+        "condition": "new"
+    }
+]
+
+_PARTNER_EQUIPMENT = [
+    # Pumps
+    {
+        "name": "Multistage Process Pump",
+        "description": "High-pressure multistage centrifugal pump for water injection",
+        "category": "pumps",
+        "subcategory": "multistage_pumps",
+        "manufacturer": "Sulzer",
+        "model": "MSD-RO",
+        "specifications": [
+            {"parameter": "flow", "value": 800, "unit": "m3/hr"},
+            {"parameter": "head", "value": 1500, "unit": "m"},
+            {"parameter": "power", "value": 1200, "unit": "kW"},
+            {"parameter": "efficiency", "value": 83, "unit": "percent"}
+        ],
+        "location_country": "Switzerland",
+        "location_city": "Winterthur",
+        "location_availability": "3-weeks",
+        "price": {"value": 320000.00, "currency": "CHF"},
+        "condition": "new"
+    },
+
+    # Heat Exchangers
+    {
+        "name": "Spiral Heat Exchanger",
+        "description": "Self-cleaning spiral heat exchanger for fouling services",
+        "category": "heat_exchangers",
+        "subcategory": "spiral",
+        "manufacturer": "Alfa Laval",
+        "model": "SHE-25",
+        "specifications": [
+            {"parameter": "heat_transfer_area", "value": 250, "unit": "m2"},
+            {"parameter": "temperature", "value": 200, "unit": "C"},
+            {"parameter": "pressure", "value": 15, "unit": "bar"}
+        ],
+        "location_country": "Sweden",
+        "location_city": "Lund",
+        "location_availability": "immediate",
+        "price": {"value": 95000.00, "currency": "EUR"},
+        "condition": "new"
+    },
+
+    # Boilers
+    {
+        "name": "Industrial Steam Boiler",
+        "description": "High-pressure water tube boiler for process steam generation",
+        "category": "boilers",
+        "subcategory": "water_tube",
+        "manufacturer": "Babcock & Wilcox",
+        "model": "FM-120",
+        "specifications": [
+            {"parameter": "steam_output", "value": 120, "unit": "tons/hr"},
+            {"parameter": "pressure", "value": 85, "unit": "bar"},
+            {"parameter": "temperature", "value": 450, "unit": "C"},
+            {"parameter": "efficiency", "value": 92, "unit": "percent"}
+        ],
+        "location_country": "UK",
+        "location_city": "Manchester",
+        "location_availability": "6-weeks",
+        "price": {"value": 2200000.00, "currency": "GBP"},
+        "condition": "new"
+    },
+    # Compressors
+    {
+        "name": "Centrifugal Air Compressor",
+        "description": "High-speed centrifugal compressor with magnetic bearings",
+        "category": "compressors",
+        "subcategory": "centrifugal",
+        "manufacturer": "Ingersoll Rand",
+        "model": "C1000",
+        "specifications": [
+            {"parameter": "flow", "value": 10000, "unit": "m3/hr"},
+            {"parameter": "pressure", "value": 8, "unit": "bar"},
+            {"parameter": "power", "value": 1000, "unit": "kW"}
+        ],
+        "location_country": "Italy",
+        "location_city": "Milan",
+        "location_availability": "immediate",
+        "price": {"value": 450000.00, "currency": "EUR"},
+        "condition": "new"
+    },
 
-            # Heat Exchangers
-            {
-                "name": "Spiral Heat Exchanger",
-                "description": "Self-cleaning spiral heat exchanger for fouling services",
-                "category": "heat_exchangers",
-                "subcategory": "spiral",
-                "manufacturer": "Alfa Laval",
-                "model": "SHE-25",
-                "specifications": [
-                    {"parameter": "heat_transfer_area", "value": 250, "unit": "m2"},
-                    {"parameter": "temperature", "value": 200, "unit": "C"},
-                    {"parameter": "pressure", "value": 15, "unit": "bar"}
-                ],
-                "location": {"country": "Sweden", "city": "Lund", "availability": "immediate"},
-                "price": {"value": 95000.00, "currency": "EUR"},
-                "condition": "new"
-            },
+    # Process Equipment
+    {
+        "name": "Vacuum Distillation Column",
+        "description": "Complete vacuum distillation system for chemical processing",
+        "category": "process_equipment",
+        "subcategory": "distillation",
+        "manufacturer": "Koch-Glitsch",
+        "model": "VDC-2000",
+        "specifications": [
+            {"parameter": "diameter", "value": 2.5, "unit": "m"},
+            {"parameter": "height", "value": 25, "unit": "m"},
+            {"parameter": "vacuum", "value": 50, "unit": "mbar"},
+            {"parameter": "capacity", "value": 100, "unit": "tons/day"}
+        ],
+        "location_country": "Germany",
+        "location_city": "Frankfurt",
+        "location_availability": "16-weeks",
+        "price": {"value": 1800000.00, "currency": "EUR"},
+        "condition": "new"
+    },
 
-            # Boilers
-            {
-                "name": "Industrial Steam Boiler",
-                "description": "High-pressure water tube boiler for process steam generation",
-                "category": "boilers",
-                "subcategory": "water_tube",
-                "manufacturer": "Babcock & Wilcox",
-                "model": "FM-120",
-                "specifications": [
-                    {"parameter": "steam_output", "value": 120, "unit": "tons/hr"},
-                    {"parameter": "pressure", "value": 85, "unit": "bar"},
-                    {"parameter": "temperature", "value": 450, "unit": "C"},
-                    {"parameter": "efficiency", "value": 92, "unit": "percent"}
-                ],
-                "location": {"country": "UK", "city": "Manchester", "availability": "6-weeks"},
-                "price": {"value": 2200000.00, "currency": "GBP"},
-                "condition": "new"
-            },
-            # Compressors
-            {
-                "name": "Centrifugal Air Compressor",
-                "description": "High-speed centrifugal compressor with magnetic bearings",
-                "category": "compressors",
-                "subcategory": "centrifugal",
-                "manufacturer": "Ingersoll Rand",
-                "model": "C1000",
-                "specifications": [
-                    {"parameter": "flow", "value": 10000, "unit": "m3/hr"},
-                    {"parameter": "pressure", "value": 8, "unit": "bar"},
-                    {"parameter": "power", "value": 1000, "unit": "kW"}
-                ],
-                "location": {"country": "Italy", "city": "Milan", "availability": "immediate"},
-                "price": {"value": 450000.00, "currency": "EUR"},
-                "condition": "new"
-            },
+    # Used Equipment
+    {
+        "name": "Refurbished Process Pump",
+        "description": "Factory reconditioned API process pump",
+        "category": "pumps",
+        "subcategory": "centrifugal_pumps",
+        "manufacturer": "Flowserve",
+        "model": "DVSH",
+        "specifications": [
+            {"parameter": "flow", "value": 350, "unit": "m3/hr"},
+            {"parameter": "head", "value": 200, "unit": "m"},
+            {"parameter": "power", "value": 250, "unit": "kW"}
+        ],
+        "location_country": "Netherlands",
+        "location_city": "Rotterdam",
+        "location_availability": "immediate",
+        "price": {"value": 45000.00, "currency": "EUR"},
+        "condition": "refurbished",
+        "refurbishment_date": "2024-01-15"
+    }
+]
 
-            # Process Equipment
-            {
-                "name": "Vacuum Distillation Column",
-                "description": "Complete vacuum distillation system for chemical processing",
-                "category": "process_equipment",
-                "subcategory": "distillation",
-                "manufacturer": "Koch-Glitsch",
-                "model": "VDC-2000",
-                "specifications": [
-                    {"parameter": "diameter", "value": 2.5, "unit": "m"},
-                    {"parameter": "height", "value": 25, "unit": "m"},
-                    {"parameter": "vacuum", "value": 50, "unit": "mbar"},
-                    {"parameter": "capacity", "value": 100, "unit": "tons/day"}
-                ],
-                "location": {"country": "Germany", "city": "Frankfurt", "availability": "16-weeks"},
-                "price": {"value": 1800000.00, "currency": "EUR"},
-                "condition": "new"
-            },
+class ExtensiveEquipmentDataLoader:
+    def __init__(self, host: str = "http://localhost:9200"):
+        self.es = get_client(host)
+        self.internal_index = "internal_equipment"
+        self.partner_index = "partner_equipment"
+
+    def _create_indices_if_not_exist(self):
+        """Create the equipment indices with an explicit mapping if they don't exist"""
+        for index in [self.internal_index, self.partner_index]:
+            if not self.es.indices.exists(index=index):
+                self.es.indices.create(
+                    index=index,
+                    mappings=EQUIPMENT_MAPPING,
+                    settings=INDEX_SETTINGS
+                )
+                logger.info(f"Created index: {index}")
+
+    def get_internal_equipment(self) -> List[Dict]:
+        """Return the shared internal equipment catalogue (treat as read-only)"""
+        return _INTERNAL_EQUIPMENT
 
-            # Used Equipment
-            {
-                "name": "Refurbished Process Pump",
-                "description": "Factory reconditioned API process pump",
-                "category": "pumps",
-                "subcategory": "centrifugal_pumps",
-                "manufacturer": "Flowserve",
-                "model": "DVSH",
-                "specifications": [
-                    {"parameter": "flow", "value": 350, "unit": "m3/hr"},
-                    {"parameter": "head", "value": 200, "unit": "m"},
-                    {"parameter": "power", "value": 250, "unit": "kW"}
-                ],
-                "location": {"country": "Netherlands", "city": "Rotterdam", "availability": "immediate"},
-                "price": {"value": 45000.00, "currency": "EUR"},
-                "condition": "refurbished",
-                "refurbishment_date": "2024-01-15"
+    def get_partner_equipment(self) -> List[Dict]:
+        """Return the shared partner equipment catalogue (treat as read-only)"""
+        return _PARTNER_EQUIPMENT
+
+    def _bulk_overridden_settings(self, indices: List[str]) -> Dict[str, Dict]:
+        """
+        Snapshot each index's values for the settings a bulk load overrides
+
+        Settings left at the cluster default come back as None, which
+        resets them to the default when the snapshot is applied.
+        """
+        response = self.es.indices.get_settings(
+            index=indices,
+            name=_BULK_LOAD_SETTING_NAMES,
+            flat_settings=True
+        )
+        return {
+            index: {
+                name: response.get(index, {}).get("settings", {}).get(name)
+                for name in _BULK_LOAD_SETTING_NAMES
             }
-        ]
+            for index in indices
+        }
 
     def load_sample_data(self):
         """Load all sample equipment data into Elasticsearch"""
@@ -250,30 +367,56 @@ class ExtensiveEquipmentDataLoader:
         internal_equipment = self.get_internal_equipment()
         partner_equipment = self.get_partner_equipment()
 
-        # Load internal equipment
-        for item in internal_equipment:
-            try:
-                item['timestamp'] = datetime.now().isoformat()
-                self.es.index(index=self.internal_index, document=item)
-                logger.info(f"Loaded internal equipment: {item['name']}")
-            except Exception as e:
-                logger.error(f"Error loading internal equipment {item['name']}: {e}")
+        # All documents in a load share one timestamp, in epoch millis
+        ts = time.time_ns() // 1_000_000
 
-        # Load partner equipment
-        for item in partner_equipment:
-            try:
-                item['timestamp'] = datetime.now().isoformat()
-                self.es.index(index=self.partner_index, document=item)
-                logger.info(f"Loaded partner equipment: {item['name']}")
-            except Exception as e:
-                logger.error(f"Error loading partner equipment {item['name']}: {e}")
+        def gen_actions():
+            for index, items in [(self.internal_index, internal_equipment),
+                                 (self.partner_index, partner_equipment)]:
+                for item in items:
+                    yield {"_index": index, "_source": {**item, "timestamp": ts}}
 
-        # Refresh indices
-        self.es.indices.refresh(index=self.internal_index)
-        self.es.indices.refresh(index=self.partner_index)
-        
+        # Indices must exist before their settings can be relaxed
+        self._create_indices_if_not_exist()
+        indices = [self.internal_index, self.partner_index]
+
+        # Stream both inventories through concurrent bulk requests
+        loaded = failed = 0
+        debug = logger.isEnabledFor(logging.DEBUG)
+        start = time.perf_counter()
+        previous_settings = self._bulk_overridden_settings(indices)
+        self.es.indices.put_settings(index=indices, settings=BULK_LOAD_SETTINGS)
+        try:
+            for ok, info in parallel_bulk(
+                self.es.options(request_timeout=60),
+                gen_actions(),
+                thread_count=BULK_THREAD_COUNT,
+                chunk_size=BULK_CHUNK_SIZE,
+                queue_size=4,
+                raise_on_error=False
+            ):
+                if ok:
+                    loaded += 1
+                    if debug:
+                        logger.debug(f"Loaded equipment: {info}")
+                else:
+                    failed += 1
+                    logger.error(f"Error loading equipment: {info}")
+        except Exception as e:
+            logger.error(f"Error bulk loading equipment: {e}")
+        finally:
+            # Restore each index's settings and make the data visible once
+            for index, settings in previous_settings.items():
+                self.es.indices.put_settings(index=index, settings=settings)
+            self.es.indices.refresh(index=indices)
+            bump_index_version()
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Loaded {loaded} equipment documents ({failed} failed) in {elapsed:.2f}s")
         logger.info("Sample data loading completed")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     loader = ExtensiveEquipmentDataLoader()
     loader.load_sample_data()
\ No newline at end of file
@@ -0,0 +1,68 @@
+from elasticsearch import Elasticsearch
+from elasticsearch.serializer import JSONSerializer
+from typing import Dict
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the stdlib serializer
+    orjson = None
+
+# Connection pool size per node; sized so bulk loader threads and
+# concurrent web-server searches don't queue for a free connection
+POOL_MAXSIZE = 32
+
+_CLIENTS: Dict[str, Elasticsearch] = {}
+
+# Bumped whenever the equipment indices are rewritten; search-result
+# caches include it in their keys so stale entries are never served.
+# The counter lives in this process only: see index_version()
+_INDEX_VERSION = 0
+
+class ORJSONSerializer(JSONSerializer):
+    """JSON serializer backed by orjson for faster request/response encoding"""
+
+    def dumps(self, data) -> bytes:
+        # Pre-encoded bodies (e.g. bulk lines) are forwarded as-is
+        if isinstance(data, (bytes, bytearray)):
+            return data
+        # orjson handles str/int/float/dict/list natively, so the base
+        # class `default` hook only runs for exotic types
+        return orjson.dumps(data, default=self.default)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+def get_client(host: str = "http://localhost:9200") -> Elasticsearch:
+    """Return the process-wide Elasticsearch client for a host, creating it on first use"""
+    client = _CLIENTS.get(host)
+    if client is None:
+        options = {}
+        if orjson is not None:
+            options["serializer"] = ORJSONSerializer()
+        client = Elasticsearch(
+            [host],
+            connections_per_node=POOL_MAXSIZE,
+            http_compress=True,
+            request_timeout=30,
+            retry_on_timeout=True,
+            **options
+        )
+        _CLIENTS[host] = client
+    return client
+
+def index_version() -> int:
+    """
+    Return the current equipment index version
+
+    The version only counts reloads made by this process. A load run from
+    another process (e.g. data_loader.py on its own) doesn't change it, so
+    a running searcher keeps serving its cached results until it restarts
+    or its caches evict them.
+    """
+    return _INDEX_VERSION
+
+def bump_index_version() -> int:
+    """Invalidate this process's cached search results after the indices were written to"""
+    global _INDEX_VERSION
+    _INDEX_VERSION += 1
+    return _INDEX_VERSION
@@ -1,12 +1,118 @@
-from elasticsearch import Elasticsearch
-from typing import Dict, List, Optional
-import json
+from es_client import get_client, index_version
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+# Applications configure handlers; the module stays silent by default
+logger.addHandler(logging.NullHandler())
+
+# Worker pool for concurrent per-index searches when msearch is disabled
+_EXEC = ThreadPoolExecutor(max_workers=4)
+
+# Number of distinct searches kept per EquipmentSearch instance
+SEARCH_CACHE_SIZE = 1024
+
+# Static parts of the search request, shared by every query
+_MATCH_FIELDS = (
+    "name^3",
+    "description^2",
+    "manufacturer",
+    "model"
+)
+# Availability values acceptable within 0-6, 7-13 and 14+ days
+_AVAIL_BY_WEEKS = (
+    ("immediate",),
+    ("immediate", "1-week"),
+    ("immediate", "1-week", "2-weeks")
+)
+# Fields print_results needs; specifications are only fetched via get_by_id
+_DISPLAY_FIELDS = (
+    "name",
+    "category",
+    "subcategory",
+    "manufacturer",
+    "location_city",
+    "location_country",
+    "location_availability",
+    "price",
+    "stock"
+)
+# Prefer shard copies on the coordinating node to avoid cross-node hops
+_PREFERENCE = "_local"
+_SORT = (
+    {"_score": {"order": "desc"}},
+    {"timestamp": {"order": "desc"}}
+)
+
+def _build_query(query_text: str,
+                 category: Optional[str] = None,
+                 min_year: Optional[int] = None,
+                 condition: Optional[str] = None,
+                 available_within_days: Optional[int] = None,
+                 location_country: Optional[str] = None) -> Dict:
+    """Build the elasticsearch query with filters"""
+    filters = []
+
+    if category:
+        filters.append({"term": {"category": category}})
+
+    if min_year:
+        filters.append({"range": {"year_manufactured": {"gte": min_year}}})
+
+    if condition:
+        filters.append({"term": {"condition": condition}})
+
+    if available_within_days:
+        weeks = min(available_within_days // 7, len(_AVAIL_BY_WEEKS) - 1)
+        filters.append({"terms": {"location_availability": _AVAIL_BY_WEEKS[weeks]}})
+
+    if location_country:
+        filters.append({"term": {"location_country": location_country}})
+
+    return {
+        "bool": {
+            "must": [
+                {"multi_match": {"query": query_text, "fields": _MATCH_FIELDS}}
+            ],
+            "filter": filters
+        }
+    }
+
+class _PartialResults(Exception):
+    """Carries the results of a search that failed on at least one index"""
+
+    def __init__(self, results: Dict[str, Tuple[Dict, ...]]):
+        super().__init__("search failed on at least one index")
+        self.results = results
 
 class EquipmentSearch:
-    def __init__(self, host: str = "http://localhost:9200"):
-        self.es = Elasticsearch([host])
+    def __init__(self, host: str = "http://localhost:9200", use_msearch: bool = True):
+        self.es = get_client(host)
         self.internal_index = "internal_equipment"
         self.partner_index = "partner_equipment"
+        # Disable when the indices can't share one msearch request
+        # (e.g. they live on different clusters)
+        self.use_msearch = use_msearch
+        # Per-instance result cache; the index version in the key
+        # invalidates it whenever the data loader rewrites the indices
+        self._cached_search = lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._fetch)
+
+    def _search_concurrently(self, indices: List[str], search_body: Dict) -> List[Dict]:
+        """Run one search per index in parallel, returning msearch-shaped responses"""
+        futures = [
+            _EXEC.submit(self.es.search, index=index, preference=_PREFERENCE, **search_body)
+            for index in indices
+        ]
+        responses = []
+        for future in futures:
+            try:
+                responses.append(future.result().body)
+            except Exception as e:
+                responses.append({"error": str(e)})
+        return responses
 
     def search_equipment(self,
                         query: str,
@@ -14,127 +120,138 @@ class EquipmentSearch:
                         min_year: Optional[int] = None,
                         condition: Optional[str] = None,
                         available_within_days: Optional[int] = None,
-                        location_country: Optional[str] = None) -> Dict[str, List[Dict]]:
+                        location_country: Optional[str] = None,
+                        source_fields: Optional[Sequence[str]] = _DISPLAY_FIELDS) -> Dict[str, Iterator[Dict]]:
         """
         Search for equipment, prioritizing internal inventory over partner inventory
+
+        Only `source_fields` are returned for each hit; pass None to get the
+        full document source. Results are lazy iterators that can be consumed
+        once; wrap them in list() if they are needed more than once.
         """
-        def build_query(query_text: str) -> Dict:
-            """Build the elasticsearch query with filters"""
-            search_query = {
-                "bool": {
-                    "must": [
-                        {
-                            "multi_match": {
-                                "query": query_text,
-                                "fields": [
-                                    "name^3",
-                                    "description^2",
-                                    "manufacturer",
-                                    "model",
-                                    "category.text"
-                                ]
-                            }
-                        }
-                    ],
-                    "filter": []
-                }
-            }
-
-            if category:
-                search_query["bool"]["filter"].append(
-                    {"term": {"category": category}}
-                )
-
-            if min_year:
-                search_query["bool"]["filter"].append(
-                    {"range": {"year_manufactured": {"gte": min_year}}}
-                )
-
-            if condition:
-                search_query["bool"]["filter"].append(
-                    {"term": {"condition": condition}}
-                )
-
-            if available_within_days:
-                availability_filter = {
-                    "nested": {
-                        "path": "location",
-                        "query": {
-                            "terms": {
-                                "location.availability": [
-                                    "immediate",
-                                    "1-week",
-                                    "2-weeks"
-                                ][:available_within_days // 7 + 1]
-                            }
-                        }
-                    }
-                }
-                search_query["bool"]["filter"].append(availability_filter)
-
-            if location_country:
-                location_filter = {
-                    "nested": {
-                        "path": "location",
-                        "query": {
-                            "term": {"location.country": location_country}
-                        }
-                    }
-                }
-                search_query["bool"]["filter"].append(location_filter)
-
-            return search_query
+        if source_fields is not None:
+            source_fields = tuple(source_fields)
+        try:
+            results = self._cached_search(
+                index_version(),
+                query,
+                category,
+                min_year,
+                condition,
+                available_within_days,
+                location_country,
+                source_fields
+            )
+        except _PartialResults as e:
+            results = e.results
+
+        # Hand out copies so callers can't modify the cached items
+        return {
+            source: (dict(item) for item in items)
+            for source, items in results.items()
+        }
 
+    def _fetch(self,
+               version: int,
+               query: str,
+               category: Optional[str],
+               min_year: Optional[int],
+               condition: Optional[str],
+               available_within_days: Optional[int],
+               location_country: Optional[str],
+               source_fields: Optional[Tuple[str, ...]]) -> Dict[str, Tuple[Dict, ...]]:
+        """Run the search; `version` only takes part in the cache key"""
         results = {}
-        
-        # Search in both indices
-        for source in ["internal", "partner"]:
-            index = self.internal_index if source == "internal" else self.partner_index
-            
+        failed = False
+        search_body = {
+            "query": _build_query(
+                query,
+                category=category,
+                min_year=min_year,
+                condition=condition,
+                available_within_days=available_within_days,
+                location_country=location_country
+            ),
+            "size": 20,
+            "sort": _SORT,
+            # Only the top hits are shown, so skip exact hit counting
+            "track_total_hits": False
+        }
+        if source_fields is not None:
+            search_body["_source"] = source_fields
+
+        sources = [("internal", self.internal_index), ("partner", self.partner_index)]
+
+        if self.use_msearch:
+            # Search both indices in a single round-trip
+            searches = []
+            for _, index in sources:
+                searches.extend([{"index": index, "preference": _PREFERENCE}, search_body])
+
             try:
-                search_results = self.es.search(
-                    index=index,
-                    query=build_query(query),
-                    size=20,
-                    sort=[
-                        {"_score": {"order": "desc"}},
-                        {"last_updated": {"order": "desc"}}
-                    ]
-                )
-                
-                results[source] = [
-                    {
-                        **hit["_source"],
-                        "relevance_score": hit["_score"]
-                    }
-                    for hit in search_results["hits"]["hits"]
-                ]
+                responses = self.es.msearch(searches=searches)["responses"]
             except Exception as e:
-                print(f"Error searching {source} inventory: {e}")
-                results[source] = []
+                logger.error(f"Error searching inventory: {e}")
+                raise _PartialResults({source: () for source, _ in sources})
+        else:
+            responses = self._search_concurrently(
+                [index for _, index in sources], search_body
+            )
+
+        for (source, _), search_results in zip(sources, responses):
+            if search_results.get("error"):
+                logger.error(f"Error searching {source} inventory: {search_results['error']}")
+                results[source] = ()
+                failed = True
+                continue
 
+            results[source] = tuple(
+                dict(hit["_source"], id=hit["_id"], relevance_score=hit["_score"])
+                for hit in search_results["hits"]["hits"]
+            )
+
+        if failed:
+            # Don't cache results from a failed search
+            raise _PartialResults(results)
         return results
 
-def print_results(results: Dict[str, List[Dict]]):
+    def get_by_id(self, doc_id: str, source: str = "internal") -> Optional[Dict]:
+        """Fetch the full document, including specifications, for a detail view"""
+        index = self.internal_index if source == "internal" else self.partner_index
+        try:
+            return self.es.get(index=index, id=doc_id)["_source"]
+        except Exception as e:
+            logger.error(f"Error fetching {source} item {doc_id}: {e}")
+            return None
+
+def print_results(results: Dict[str, Iterator[Dict]]):
     """Helper function to print search results in a readable format"""
+    # Collect every line first and emit them with a single write
+    lines = []
     for source in ["internal", "partner"]:
-        print(f"\n{source.upper()} RESULTS:")
-        if not results[source]:
-            print("No results found")
-            continue
-            
+        lines.append(f"\n{source.upper()} RESULTS:")
+        found = False
         for item in results[source]:
-            print("\n---")
-            print(f"Name: {item['name']}")
-            print(f"Category: {item['category']} / {item['subcategory']}")
-            print(f"Manufacturer: {item['manufacturer']}")
-            print(f"Location: {item['location']['city']}, {item['location']['country']}")
-            print(f"Availability: {item['location']['availability']}")
-            print(f"Price: {item['price']['currency']} {item['price']['value']:,.2f}")
-            print(f"Stock: {item['stock']['quantity']} units")
-            print(f"Score: {item['relevance_score']:.2f}")
+            found = True
+            price = item['price']
+            lines.extend([
+                "\n---",
+                f"Name: {item['name']}",
+                f"Category: {item['category']} / {item['subcategory']}",
+                f"Manufacturer: {item['manufacturer']}",
+                f"Location: {item['location_city']}, {item['location_country']}",
+                f"Availability: {item['location_availability']}",
+                f"Price: {price['currency']} {price['value']:,.2f}",
+                f"Stock: {item['stock']['quantity']} units",
+                f"Score: {item['relevance_score']:.2f}"
+            ])
+        if not found:
+            lines.append("No results found")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     # Initialize search
     search = EquipmentSearch()
     
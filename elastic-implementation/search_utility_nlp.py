@@ -1,176 +1,501 @@
-from elasticsearch import Elasticsearch
-from typing import Dict, List, Optional, Tuple
-from sentence_transformers import SentenceTransformer
-import spacy
+from es_client import get_client, index_version
+from data_loader import EQUIPMENT_MAPPING, INDEX_SETTINGS
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 import numpy as np
 from dataclasses import dataclass
+from functools import lru_cache
+from hashlib import blake2b
+import copy
+import os
 import re
+import sqlite3
+import threading
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Applications configure handlers; the module stays silent by default
+logger.addHandler(logging.NullHandler())
 
-@dataclass
+# spaCy and sentence-transformers take seconds to import, so they are only
+# imported when a model is first needed
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Semantic result cache: recent query embeddings kept in a fixed-size ring,
+# and the cosine similarity above which a cached result is reused
+SEMANTIC_CACHE_SIZE = 512
+SEMANTIC_CACHE_THRESHOLD = 0.92
+
+# Matching specs may deviate this far from the requested value (±20%)
+SPEC_RANGE_LOW = 0.8
+SPEC_RANGE_HIGH = 1.2
+
+# Fields the search results are displayed with; descriptions and
+# specifications stay on the server
+DISPLAY_FIELDS = (
+    "name",
+    "category",
+    "manufacturer",
+    "model",
+    "price",
+    "condition",
+    "location_country",
+    "location_city",
+    "location_availability"
+)
+
+# Number of parsed queries kept per NLPEquipmentSearch instance
+PARSE_CACHE_SIZE = 1024
+
+# Place names that make a lowercase query worth running NER on; seeded
+# from the countries and cities in the sample catalogues
+LOCATION_GAZETTEER = (
+    "usa", "us", "united states", "america", "canada", "mexico", "brazil",
+    "uk", "united kingdom", "england", "germany", "france", "italy", "spain",
+    "netherlands", "belgium", "switzerland", "sweden", "norway", "denmark",
+    "poland", "austria", "china", "japan", "india", "korea", "australia",
+    "houston", "chicago", "cleveland", "schenectady", "hamburg", "frankfurt",
+    "berlin", "munich", "winterthur", "lund", "manchester", "london", "milan",
+    "rotterdam", "amsterdam", "paris"
+)
+
+# Equipment taxonomy with variations
+EQUIPMENT_CATEGORIES = {
+    "pump": "pumps",
+    "pumps": "pumps",
+    "compressor": "compressors",
+    "compressors": "compressors",
+    "turbine": "turbines",
+    "turbines": "turbines",
+    "valve": "valves",
+    "valves": "valves",
+    "heat exchanger": "heat_exchangers",
+    "heat exchangers": "heat_exchangers",
+    "boiler": "boilers",
+    "boilers": "boilers",
+    "filter": "filtration",
+    "filters": "filtration",
+    "mill": "mills",
+    "mills": "mills",
+    "reactor": "reactors",
+    "reactors": "reactors",
+    "dryer": "dryers",
+    "dryers": "dryers"
+}
+
+# Specification patterns with variations
+SPEC_PATTERNS = {
+    "flow": r"(\d+(?:\.\d+)?)\s*(m3/hr?|m³/hr?|gpm)",
+    "pressure": r"(\d+(?:\.\d+)?)\s*(bar|psi|kPa)",
+    "temperature": r"(\d+(?:\.\d+)?)\s*(°?C|°?F|celsius|fahrenheit)",
+    "power": r"(\d+(?:\.\d+)?)\s*(kW|hp|MW)",
+    "capacity": r"(\d+(?:\.\d+)?)\s*(tons?/hr|kg/hr|t/hr)"
+}
+
+# Price patterns in order of preference
+PRICE_PATTERNS = (
+    r"(?:under|less than|max|maximum|up to)\s*[\$€£]?\s*(\d+(?:\.\d+)?[k,m]?)",
+    r"[\$€£]\s*(\d+(?:\.\d+)?[k,m]?)",
+    r"(\d+(?:\.\d+)?[k,m]?)\s*(?:dollars|euros|pounds)"
+)
+
+# Availability and condition keywords are matched as whole words so e.g.
+# "already" doesn't read as "ready" or "renewed" as "new"; multi-word
+# availability phrases are substring-matched
+AVAILABILITY_WORDS = frozenset({"available", "immediate", "immediately", "ready"})
+AVAILABILITY_PHRASES = ("in stock",)
+CONDITION_WORDS = frozenset({"new", "used", "refurbished", "reconditioned"})
+
+def _phrase_pattern(phrases) -> re.Pattern:
+    """Compile phrases into one whole-word alternation, longest first"""
+    # Longest first so e.g. "heat exchangers" wins over "heat exchanger"
+    return re.compile(
+        r"\b(?:" + "|".join(
+            r"\s+".join(map(re.escape, phrase.split()))
+            for phrase in sorted(phrases, key=len, reverse=True)
+        ) + r")\b"
+    )
+
+# Patterns are compiled once at import and shared by every instance
+_CATEGORY_RE = _phrase_pattern(EQUIPMENT_CATEGORIES)
+_GAZETTEER_RE = _phrase_pattern(LOCATION_GAZETTEER)
+
+# All spec patterns in one alternation so a single pass over the query
+# finds every spec; each outer group is named after its spec type.
+# Matching is case-insensitive, so units must end on a word boundary to
+# keep e.g. "15 compressors" from reading as 15 °C.
+_SPEC_RE = re.compile(
+    "|".join(f"(?P<{spec_type}>{pattern})\\b"
+             for spec_type, pattern in SPEC_PATTERNS.items()),
+    re.IGNORECASE
+)
+
+# Price patterns fused the same way; outer groups are named price0,
+# price1, ... after their rank. None of the later patterns can start
+# inside an earlier one's match, so the best-ranked match is the same one
+# a search per pattern would find.
+_PRICE_RE = re.compile(
+    "|".join(f"(?P<price{rank}>{pattern})"
+             for rank, pattern in enumerate(PRICE_PATTERNS)),
+    re.IGNORECASE
+)
+_PRICE_RANK = {f"price{rank}": rank for rank in range(len(PRICE_PATTERNS))}
+
+_WORD_RE = re.compile(r"\w+")
+
+EMBEDDING_MODEL = 'all-mpnet-base-v2'
+# int8 (AVX512-VNNI) ONNX export published with the model; used whenever
+# the ONNX runtime is installed (sentence-transformers[onnx])
+EMBEDDING_ONNX_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+# Without ONNX, quantize the PyTorch model's linear layers to int8 instead
+QUANTIZE_TORCH_FALLBACK = True
+# Query embeddings kept in memory, backed by an on-disk store so warm
+# restarts skip encoding
+EMBEDDING_CACHE_SIZE = 4096
+EMBEDDING_STORE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "nlp_eq_search", "embeddings.db"
+)
+# Stored embeddings kept on disk; the oldest are pruned past this
+EMBEDDING_STORE_MAX_ROWS = 200_000
+
+@lru_cache(maxsize=1)
+def _get_spacy():
+    """Load the spaCy pipeline once per process; only NER is used"""
+    # NER has its own internal tok2vec in the trained English pipelines, so
+    # the shared tok2vec feeding the tagger and parser isn't needed either.
+    # Excluded components are never loaded, unlike disabled ones.
+    import spacy
+    return spacy.load(
+        "en_core_web_sm",
+        exclude=["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer"]
+    )
+
+@lru_cache(maxsize=1)
+def _load_embedder() -> Tuple["SentenceTransformer", str]:
+    """Load the sentence embedding model once per process, with the name of its variant"""
+    from sentence_transformers import SentenceTransformer
+    try:
+        model = SentenceTransformer(
+            EMBEDDING_MODEL,
+            backend="onnx",
+            model_kwargs={"file_name": EMBEDDING_ONNX_FILE}
+        )
+        return model, f"onnx:{EMBEDDING_ONNX_FILE}"
+    except Exception as e:
+        logger.warning(f"ONNX embedding backend unavailable, using PyTorch: {e}")
+
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    if model.device.type == "cuda":
+        # Half precision halves weight traffic and runs on tensor cores
+        return model.half(), "torch:fp16"
+    if not QUANTIZE_TORCH_FALLBACK or model.device.type != "cpu":
+        return model, "torch"
+    try:
+        import torch
+        engines = torch.backends.quantized.supported_engines
+        # fbgemm on x86, qnnpack on ARM
+        for engine in ("fbgemm", "qnnpack"):
+            if engine in engines:
+                torch.backends.quantized.engine = engine
+                break
+        transformer = model[0]
+        transformer.auto_model = torch.quantization.quantize_dynamic(
+            transformer.auto_model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        return model, "torch:qint8"
+    except Exception as e:
+        logger.warning(f"Could not quantize the embedding model, using FP32: {e}")
+        return SentenceTransformer(EMBEDDING_MODEL), "torch"
+
+def _get_embedder() -> "SentenceTransformer":
+    """Return the process-wide sentence embedding model"""
+    return _load_embedder()[0]
+
+# The store's single connection is shared by every searching thread, so
+# each statement and transaction on it runs under this lock
+_STORE_LOCK = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _get_embedding_store() -> Optional[sqlite3.Connection]:
+    """Open the persistent embedding store, or None if it can't be used"""
+    try:
+        os.makedirs(os.path.dirname(EMBEDDING_STORE_PATH), exist_ok=True)
+        store = sqlite3.connect(EMBEDDING_STORE_PATH, check_same_thread=False)
+        with store:
+            store.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+            )
+            # Records the model variant that last encoded, so a cold process
+            # can look up stored vectors without loading the model
+            store.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)"
+            )
+        return store
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Embedding store unavailable, caching in memory only: {e}")
+        return None
+
+def _store_key(variant: str, text: str) -> str:
+    """Key of a stored embedding; variants embed slightly differently, so they don't share vectors"""
+    return blake2b(f"{EMBEDDING_MODEL}\0{variant}\0{text}".encode(), digest_size=16).hexdigest()
+
+def _stored_variant(store: sqlite3.Connection) -> Optional[str]:
+    """The model variant in use: the loaded one, else the one that last wrote to the store"""
+    if _load_embedder.cache_info().currsize:
+        return _load_embedder()[1]
+    with _STORE_LOCK:
+        row = store.execute("SELECT value FROM meta WHERE name = 'variant'").fetchone()
+    return row[0] if row is not None else None
+
+@lru_cache(maxsize=EMBEDDING_CACHE_SIZE)
+def _embed(text: str) -> np.ndarray:
+    """Return the unit-length float16 embedding of text, so a dot product is the cosine"""
+    # Look the text up before loading the model, so warm restarts whose
+    # queries are all stored never load it
+    store = _get_embedding_store()
+    if store is not None:
+        try:
+            variant = _stored_variant(store)
+            row = None
+            if variant is not None:
+                with _STORE_LOCK:
+                    row = store.execute(
+                        "SELECT vector FROM embeddings WHERE key = ?",
+                        (_store_key(variant, text),)
+                    ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read stored embedding: {e}")
+            row = None
+        if row is not None:
+            return np.frombuffer(row[0], dtype=np.float16)
+
+    model, variant = _load_embedder()
+    vector = model.encode(text, normalize_embeddings=True).astype(np.float16)
+    # Cached vectors are shared between callers
+    vector.flags.writeable = False
+    if store is not None:
+        try:
+            with _STORE_LOCK, store:
+                rowid = store.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    (_store_key(variant, text), vector.tobytes())
+                ).lastrowid
+                # Rowids grow with each write, so this drops the oldest rows
+                store.execute(
+                    "DELETE FROM embeddings WHERE rowid <= ?",
+                    (rowid - EMBEDDING_STORE_MAX_ROWS,)
+                )
+                store.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('variant', ?)",
+                    (variant,)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not persist embedding: {e}")
+    return vector
+
+@dataclass(frozen=True, slots=True)
 class SearchIntent:
+    """Parsed query; shared through the parse cache, so treat it as read-only"""
     category: Optional[str]
-    specs: List[Dict[str, str]]
-    conditions: List[str]
-    locations: List[str]
+    specs: Tuple[Dict[str, str], ...]
+    conditions: Tuple[str, ...]
+    locations: Tuple[str, ...]
     availability_required: bool
     price_range: Optional[Dict[str, float]]
 
 class NLPEquipmentSearch:
     def __init__(self, host: str = "http://localhost:9200"):
-        self.es = Elasticsearch([host])
+        self.es = get_client(host)
         self.internal_index = "internal_equipment"
         self.partner_index = "partner_equipment"
         
-        # Initialize NLP models
-        self.nlp = spacy.load("en_core_web_sm")
-        self.embedding_model = SentenceTransformer('all-mpnet-base-v2')
-        
-        # Equipment taxonomy with variations
-        self.equipment_categories = {
-            "pump": "pumps",
-            "pumps": "pumps",
-            "compressor": "compressors",
-            "compressors": "compressors",
-            "turbine": "turbines",
-            "turbines": "turbines",
-            "valve": "valves",
-            "valves": "valves",
-            "heat exchanger": "heat_exchangers",
-            "heat exchangers": "heat_exchangers",
-            "boiler": "boilers",
-            "boilers": "boilers",
-            "filter": "filtration",
-            "filters": "filtration",
-            "mill": "mills",
-            "mills": "mills",
-            "reactor": "reactors",
-            "reactors": "reactors",
-            "dryer": "dryers",
-            "dryers": "dryers"
-        }
-        
-        # Specification patterns with variations
-        self.spec_patterns = {
-            "flow": r"(\d+(?:\.\d+)?)\s*(m3/hr?|m³/hr?|gpm)",
-            "pressure": r"(\d+(?:\.\d+)?)\s*(bar|psi|kPa)",
-            "temperature": r"(\d+(?:\.\d+)?)\s*(°?C|°?F|celsius|fahrenheit)",
-            "power": r"(\d+(?:\.\d+)?)\s*(kW|hp|MW)",
-            "capacity": r"(\d+(?:\.\d+)?)\s*(tons?/hr|kg/hr|t/hr)"
-        }
+        # Equipment taxonomy and spec patterns (shared, treat as read-only)
+        self.equipment_categories = EQUIPMENT_CATEGORIES
+        self.spec_patterns = SPEC_PATTERNS
+
+        # Semantic cache of recent searches. Embedding similarity only finds
+        # candidates: queries that embed almost the same can still ask for
+        # different filters ("new pumps in Germany" vs "used pumps in
+        # France"), so an entry is served only for an identical intent, and
+        # never from before the indices were reloaded.
+        # Sized from the first embedding, so the model isn't loaded here
+        self._cache_embs: Optional[np.ndarray] = None
+        self._cache_entries: List[Optional[Tuple[int, SearchIntent, Dict[str, List[Dict]]]]] = [None] * SEMANTIC_CACHE_SIZE
+        self._cache_count = 0
+        self._cache_next = 0
+        self._cache_warned = False
+        # Searches may run on several threads; the ring's arrays and
+        # counters are read and updated together under this lock
+        self._cache_lock = threading.Lock()
+
+        # Parsing is deterministic in the query text, so repeated queries
+        # reuse the earlier intent instead of rerunning spaCy and the regexes
+        self._cached_parse = lru_cache(maxsize=PARSE_CACHE_SIZE)(self._parse_query)
+
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first use and shared across instances"""
+        return _get_spacy()
+
+    @property
+    def embedding_model(self) -> "SentenceTransformer":
+        """Sentence embedding model, loaded on first use and shared across instances"""
+        return _get_embedder()
+
+    def _semantic_cache_failed(self, error: Exception):
+        """Report a semantic cache failure, warning only the first time"""
+        if self._cache_warned:
+            logger.debug(f"Semantic cache unavailable: {error}")
+        else:
+            self._cache_warned = True
+            logger.warning(f"Semantic cache unavailable, searching without it: {error}")
+
+    def _semantic_cache_get(self, intent: SearchIntent, query_emb: np.ndarray) -> Optional[Dict[str, List[Dict]]]:
+        """Return a copy of the cached results for a near-identical earlier query with the same intent"""
+        version = index_version()
+        with self._cache_lock:
+            if not self._cache_count:
+                return None
+            sims = self._cache_embs[:self._cache_count] @ query_emb
+            # Try every candidate above the threshold, most similar first, so a
+            # stale or differently filtered nearest entry doesn't hide a valid one
+            candidates = np.flatnonzero(sims >= SEMANTIC_CACHE_THRESHOLD)
+            for slot in candidates[np.argsort(-sims[candidates])]:
+                entry_version, entry_intent, results = self._cache_entries[slot]
+                if entry_version == version and entry_intent == intent:
+                    break
+            else:
+                return None
+        # Stored results are never modified, so they can be copied unlocked
+        return copy.deepcopy(results)
+
+    def _semantic_cache_put(self, intent: SearchIntent, query_emb: np.ndarray, results: Dict[str, List[Dict]]):
+        """Remember the results of a search, evicting the oldest entry when full"""
+        entry = (index_version(), intent, copy.deepcopy(results))
+        with self._cache_lock:
+            if self._cache_embs is None:
+                self._cache_embs = np.zeros((SEMANTIC_CACHE_SIZE, query_emb.shape[0]), dtype=np.float32)
+            slot = self._cache_next
+            self._cache_embs[slot] = query_emb
+            self._cache_entries[slot] = entry
+            self._cache_next = (slot + 1) % SEMANTIC_CACHE_SIZE
+            self._cache_count = min(self._cache_count + 1, SEMANTIC_CACHE_SIZE)
 
     def _create_indices_if_not_exist(self):
         """Create indices with proper mappings if they don't exist"""
-        mapping = {
-            "mappings": {
-                "properties": {
-                    "name": {"type": "text"},
-                    "description": {"type": "text"},
-                    "category": {"type": "keyword"},
-                    "manufacturer": {"type": "keyword"},
-                    "specifications": {
-                        "type": "nested",
-                        "properties": {
-                            "parameter": {"type": "keyword"},
-                            "value": {"type": "float"},
-                            "unit": {"type": "keyword"}
-                        }
-                    },
-                    "location": {
-                        "type": "nested",
-                        "properties": {
-                            "country": {"type": "keyword"},
-                            "availability": {"type": "keyword"}
-                        }
-                    },
-                    "price": {
-                        "type": "nested",
-                        "properties": {
-                            "value": {"type": "float"},
-                            "currency": {"type": "keyword"}
-                        }
-                    },
-                    "condition": {"type": "keyword"}
-                }
-            }
-        }
-
+        # Share the loader's mapping so documents match whichever side
+        # creates the index first
         for index in [self.internal_index, self.partner_index]:
             if not self.es.indices.exists(index=index):
-                self.es.indices.create(index=index, body=mapping)
+                self.es.indices.create(
+                    index=index,
+                    mappings=EQUIPMENT_MAPPING,
+                    settings=INDEX_SETTINGS
+                )
                 logger.info(f"Created index: {index}")
 
     def parse_natural_query(self, query: str) -> SearchIntent:
         """Parse natural language query into structured search intent"""
-        doc = self.nlp(query.lower())
-        
-        intent = SearchIntent(
-            category=None,
-            specs=[],
-            conditions=[],
-            locations=[],
-            availability_required=False,
-            price_range=None
-        )
-        
-        # Extract equipment category
-        words = query.lower().split()
-        for i in range(len(words)):
-            for j in range(i + 1, len(words) + 1):
-                phrase = " ".join(words[i:j])
-                if phrase in self.equipment_categories:
-                    intent.category = self.equipment_categories[phrase]
-                    break
+        return self._cached_parse(query)
+
+    def _parse_query(self, query: str) -> SearchIntent:
+        """Uncached parse behind parse_natural_query"""
+        query_lower = query.lower()
+        doc = self.nlp(query) if self._may_name_location(query, query_lower) else None
+        return self._intent_from_doc(query_lower, doc)
+
+    def parse_natural_queries(self, queries: List[str]) -> List[SearchIntent]:
+        """Parse several queries, streaming them through spaCy in batches"""
+        if not queries:
+            return []
+        # Repeated queries in a batch are parsed once and share the intent
+        unique = list(dict.fromkeys(queries))
+        lowered = [query.lower() for query in unique]
+        # Only queries that may name a place go through spaCy
+        docs = [None] * len(unique)
+        ner_positions = [i for i, (query, query_lower) in enumerate(zip(unique, lowered))
+                         if self._may_name_location(query, query_lower)]
+        if ner_positions:
+            ner_docs = self.nlp.pipe((unique[i] for i in ner_positions),
+                                     batch_size=min(64, len(ner_positions)))
+            for i, doc in zip(ner_positions, ner_docs):
+                docs[i] = doc
+        intents = {
+            query: self._intent_from_doc(query_lower, doc)
+            for query, query_lower, doc in zip(unique, lowered, docs)
+        }
+        return [intents[query] for query in queries]
+
+    def _may_name_location(self, query: str, query_lower: str) -> bool:
+        """Whether NER could find a place: the query has a capital or a known place name"""
+        return (query != query_lower
+                or _GAZETTEER_RE.search(query_lower) is not None)
+
+    def _intent_from_doc(self, query_lower: str, doc) -> SearchIntent:
+        """Build the search intent for a lowercased query and its parsed doc, if any"""
+        # Extract equipment category; the last mention wins
+        category = None
+        for match in _CATEGORY_RE.finditer(query_lower):
+            phrase = " ".join(match.group().split())
+            category = self.equipment_categories[phrase]
         
-        # Extract specifications with better error handling
-        for spec_type, pattern in self.spec_patterns.items():
+        # Extract specifications in one scan; the value and unit groups
+        # directly follow the named group of the spec type that matched
+        specs = []
+        groupindex = _SPEC_RE.groupindex
+        for match in _SPEC_RE.finditer(query_lower):
+            spec_type = match.lastgroup
             try:
-                matches = re.finditer(pattern, query.lower())
-                for match in matches:
-                    value, unit = match.groups()
-                    intent.specs.append({
-                        "type": spec_type,
-                        "value": float(value),
-                        "unit": unit
-                    })
+                group = groupindex[spec_type]
+                specs.append({
+                    "type": spec_type,
+                    "value": float(match.group(group + 1)),
+                    "unit": match.group(group + 2)
+                })
             except Exception as e:
                 logger.warning(f"Error parsing specification {spec_type}: {e}")
         
+        # Tokenize once for the availability and condition checks
+        words = frozenset(_WORD_RE.findall(query_lower))
+
         # Check for availability requirements
-        availability_keywords = ["available", "in stock", "immediate", "ready"]
-        if any(keyword in query.lower() for keyword in availability_keywords):
-            intent.availability_required = True
+        availability_required = (
+            not AVAILABILITY_WORDS.isdisjoint(words)
+            or any(phrase in query_lower for phrase in AVAILABILITY_PHRASES)
+        )
         
         # Extract locations with better entity recognition
-        for ent in doc.ents:
-            if ent.label_ in ["GPE", "LOC"]:
-                intent.locations.append(ent.text.lower())
+        locations = () if doc is None else tuple(
+            ent.text.lower() for ent in doc.ents if ent.label_ in ["GPE", "LOC"]
+        )
         
         # Extract conditions
-        condition_keywords = ["new", "used", "refurbished", "reconditioned"]
-        intent.conditions = [word for word in condition_keywords 
-                           if word in query.lower()]
+        conditions = tuple(sorted(CONDITION_WORDS & words))
         
         # Extract price information with better pattern matching
-        price_patterns = [
-            r"(?:under|less than|max|maximum|up to)\s*[\$€£]?\s*(\d+(?:\.\d+)?[k,m]?)",
-            r"[\$€£]\s*(\d+(?:\.\d+)?[k,m]?)",
-            r"(\d+(?:\.\d+)?[k,m]?)\s*(?:dollars|euros|pounds)"
-        ]
-        
-        for pattern in price_patterns:
-            price_match = re.search(pattern, query.lower())
-            if price_match:
-                price_str = price_match.group(1)
-                multiplier = 1000 if 'k' in price_str else 1000000 if 'm' in price_str else 1
-                base_price = float(re.sub('[km]', '', price_str))
-                intent.price_range = {"max": base_price * multiplier}
-                break
+        price_range = None
+        price_match = None
+        best_rank = len(_PRICE_RANK)
+        for match in _PRICE_RE.finditer(query_lower):
+            rank = _PRICE_RANK[match.lastgroup]
+            if rank < best_rank:
+                price_match, best_rank = match, rank
+                if rank == 0:
+                    break
+        if price_match:
+            price_str = price_match.group(_PRICE_RE.groupindex[price_match.lastgroup] + 1)
+            multiplier = 1000 if 'k' in price_str else 1000000 if 'm' in price_str else 1
+            base_price = float(re.sub('[km]', '', price_str))
+            price_range = {"max": base_price * multiplier}
         
-        return intent
+        return SearchIntent(
+            category=category,
+            specs=tuple(specs),
+            conditions=conditions,
+            locations=locations,
+            availability_required=availability_required,
+            price_range=price_range
+        )
 
     def build_elasticsearch_query(self, intent: SearchIntent) -> Dict:
         """Build Elasticsearch query from search intent"""
@@ -193,6 +518,7 @@ class NLPEquipmentSearch:
 
         # Add specification filters
         for spec in intent.specs:
+            value = spec["value"]
             spec_filter = {
                 "nested": {
                     "path": "specifications",
@@ -203,8 +529,8 @@ class NLPEquipmentSearch:
                                 {
                                     "range": {
                                         "specifications.value": {
-                                            "gte": spec["value"] * 0.8,
-                                            "lte": spec["value"] * 1.2
+                                            "gte": value * SPEC_RANGE_LOW,
+                                            "lte": value * SPEC_RANGE_HIGH
                                         }
                                     }
                                 }
@@ -215,41 +541,24 @@ class NLPEquipmentSearch:
             }
             query["bool"]["filter"].append(spec_filter)
 
+        # Location and price are single-valued per document, so they are
+        # plain fields and need no nested query
         # Add availability filter
         if intent.availability_required:
             query["bool"]["filter"].append({
-                "nested": {
-                    "path": "location",
-                    "query": {
-                        "term": {"location.availability": "immediate"}
-                    }
-                }
+                "term": {"location_availability": "immediate"}
             })
 
         # Add location filter
         if intent.locations:
             query["bool"]["filter"].append({
-                "nested": {
-                    "path": "location",
-                    "query": {
-                        "terms": {"location.country": intent.locations}
-                    }
-                }
+                "terms": {"location_country": intent.locations}
             })
 
         # Add price filter
         if intent.price_range:
             query["bool"]["filter"].append({
-                "nested": {
-                    "path": "price",
-                    "query": {
-                        "range": {
-                            "price.value": {
-                                "lte": intent.price_range.get("max")
-                            }
-                        }
-                    }
-                }
+                "range": {"price.value": {"lte": intent.price_range.get("max")}}
             })
 
         # Add condition filter
@@ -264,57 +573,112 @@ class NLPEquipmentSearch:
         """
         Perform equipment search using natural language query
         """
+        return self._search_with_intent(query)
+
+    def _search_with_intent(self, query: str, intent: Optional[SearchIntent] = None) -> Dict[str, List[Dict]]:
+        """Search for a query, parsing it only if no intent is given"""
         try:
             # Ensure indices exist
             self._create_indices_if_not_exist()
-            
-            # Parse query intent
-            intent = self.parse_natural_query(query)
+
+            # Parse query intent; the cache only serves entries with the
+            # same intent, so this comes first
+            if intent is None:
+                intent = self.parse_natural_query(query)
+
+            # Serve near-duplicate queries from the semantic cache. The
+            # cache is best-effort: the keyword and filter search needs no
+            # embedding, so a broken embedder only disables caching
+            try:
+                query_emb = _embed(query)
+                cached = self._semantic_cache_get(intent, query_emb)
+                if cached is not None:
+                    return cached
+            except Exception as e:
+                query_emb = None
+                self._semantic_cache_failed(e)
             
             # Build and execute query
             es_query = self.build_elasticsearch_query(intent)
-            return self._execute_search(es_query)
+            results, complete = self._execute_search(es_query)
+            # A failed index would otherwise be served as empty results
+            # to every near-identical query until the entry is evicted
+            if complete and query_emb is not None:
+                try:
+                    self._semantic_cache_put(intent, query_emb, results)
+                except Exception as e:
+                    self._semantic_cache_failed(e)
+            return results
             
         except Exception as e:
             logger.error(f"Error in search_equipment: {e}")
             return {"internal": [], "partner": []}
 
-    def _execute_search(self, query: Dict) -> Dict[str, List[Dict]]:
-        """Execute search across both indices with better error handling"""
+    def _execute_search(self, query: Dict) -> Tuple[Dict[str, List[Dict]], bool]:
+        """
+        Execute search across both indices in a single msearch request
+
+        Returns the results and whether every index answered; failed
+        indices contribute no items.
+        """
         results = {"internal": [], "partner": []}
-        
-        for source, index in [("internal", self.internal_index), 
-                            ("partner", self.partner_index)]:
-            try:
-                search_results = self.es.search(
-                    index=index,
-                    query=query,
-                    size=20
-                )
-                
-                results[source] = [
-                    {
-                        **hit["_source"],
-                        "score": hit["_score"]
-                    }
-                    for hit in search_results["hits"]["hits"]
-                ]
-            except Exception as e:
-                logger.error(f"Error searching {source} inventory: {e}")
-                results[source] = []
+        sources = [("internal", self.internal_index), ("partner", self.partner_index)]
+
+        search_body = {"query": query, "size": 20, "_source": DISPLAY_FIELDS}
+        searches = []
+        for _, index in sources:
+            searches.extend([{"index": index}, search_body])
+
+        try:
+            responses = self.es.msearch(searches=searches)["responses"]
+        except Exception as e:
+            logger.error(f"Error searching inventory: {e}")
+            return results, False
+
+        complete = True
+        for (source, _), search_results in zip(sources, responses):
+            if search_results.get("error"):
+                logger.error(f"Error searching {source} inventory: {search_results['error']}")
+                complete = False
+                continue
+
+            # Each hit's source is a fresh dict, so tag it in place
+            # instead of copying it into a new one
+            items = results[source]
+            for hit in search_results["hits"]["hits"]:
+                item = hit["_source"]
+                item["score"] = hit["_score"]
+                items.append(item)
                 
-        return results
+        return results, complete
 
     def explain_search(self, query: str) -> Tuple[SearchIntent, Dict[str, List[Dict]]]:
         """
         Perform search and return both results and explanation of how the query was understood
+
+        The results always belong to the returned intent: the semantic cache
+        only serves entries cached for an identical intent.
         """
         intent = self.parse_natural_query(query)
-        results = self.search_equipment(query)
+        results = self._search_with_intent(query, intent)
         return intent, results
 
+    def search_equipment_many(self, queries: List[str]) -> List[Dict[str, List[Dict]]]:
+        """Search for several natural language queries, parsing them in one batch"""
+        return [results for _, results in self.explain_searches(queries)]
+
+    def explain_searches(self, queries: List[str]) -> List[Tuple[SearchIntent, Dict[str, List[Dict]]]]:
+        """Search for several queries, returning each one's intent and results"""
+        intents = self.parse_natural_queries(queries)
+        return [
+            (intent, self._search_with_intent(query, intent))
+            for query, intent in zip(queries, intents)
+        ]
+
 # Example usage
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     search = NLPEquipmentSearch()
     
     # Example natural language queries
@@ -327,9 +691,11 @@ if __name__ == "__main__":
         "Need immediate availability turbines in USA"
     ]
     
-    for query in example_queries:
+    # Parse all example queries in one batch, then search with each intent
+    explained = search.explain_searches(example_queries)
+
+    for query, (intent, results) in zip(example_queries, explained):
         print(f"\nProcessing query: {query}")
-        intent, results = search.explain_search(query)
         
         print("\nUnderstood Search Intent:")
         print(f"Category: {intent.category}")
@@ -348,6 +714,6 @@ if __name__ == "__main__":
                 if 'price' in item:
                     print(f"  Price: {item['price'].get('currency', 'USD')} "
                           f"{item['price'].get('value', 0):,.2f}")
-                if 'location' in item:
-                    print(f"  Location: {item['location'].get('country', 'Unknown')}")
-                    print(f"  Availability: {item['location'].get('availability', 'Unknown')}")
\ No newline at end of file
+                if 'location_country' in item:
+                    print(f"  Location: {item['location_country']}")
+                    print(f"  Availability: {item.get('location_availability', 'Unknown')}")
\ No newline at end of file
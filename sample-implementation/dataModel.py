@@ -2,14 +2,14 @@ from dataclasses import dataclass
 from typing import List, Optional
 from datetime import datetime
 
-@dataclass
+@dataclass(slots=True)
 class Manufacturer:
     name: str
     country: str
     contact_email: Optional[str] = None
     contact_phone: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class InventoryItem:
     sku: str
     name: str
@@ -1,92 +1,128 @@
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from opensearchpy import OpenSearch, TransportError, Urllib3HttpConnection, helpers
+from opensearchpy.serializer import JSONSerializer
 from sentence_transformers import SentenceTransformer
-import numpy as np
 from tabulate import tabulate
-import time
+import numpy as np
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Union, Optional
 
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the stdlib serializer
+    orjson = None
+
+# Nearest neighbours fetched per requested result, so the inventory boost
+# can still reorder candidates that rank just below the cut
+KNN_CANDIDATE_FACTOR = 4
+
+# Score multipliers per stock status for queries that mention inventory
+INVENTORY_BOOSTS = {'optimal': 1.2, 'excess': 0.8, 'critical': 0.6}
+
+# Results are displayed from their source fields; the embedding is only
+# used inside OpenSearch
+_RESULT_SOURCE = {"excludes": ["embedding"]}
+
+# Parts embedded per batch while the previous batch is being indexed
+INDEX_CHUNK_SIZE = 256
+
+# Query embeddings kept per search instance
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+
+class ORJSONSerializer(JSONSerializer):
+    """JSON serializer backed by orjson that writes numpy arrays directly"""
+
+    def dumps(self, data) -> str:
+        if isinstance(data, str):
+            return data
+        # The bulk helper measures chunks with str.encode, so hand back
+        # text rather than orjson's bytes
+        return orjson.dumps(
+            data, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+def knn_score_to_similarity(score: float) -> float:
+    """Undo OpenSearch's inner-product score transform to get the raw dot product"""
+    return score - 1 if score >= 1 else 1 - 1 / score
+
+# Spec value patterns and unit multipliers, compiled once at import
+_POWER_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(W|KW|MW)?', re.IGNORECASE)
+_VOLT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(V|KV|MV)?', re.IGNORECASE)
+_DIM_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(mm|cm|m|in)?', re.IGNORECASE)
+_PRICE_RE = re.compile(r'(?P<op>under|over)\s*\$?\s*(?P<n>\d+(?:\.\d+)?)', re.IGNORECASE)
+
+_POWER_UNITS = {'KW': 1000, 'MW': 1000000}
+_VOLT_UNITS = {'KV': 1000, 'MV': 1000000}
+_DIM_UNITS = {'CM': 10, 'M': 1000, 'IN': 25.4}
+
+def _scaled_value(value: str, pattern: re.Pattern, units: Dict[str, float]) -> Optional[float]:
+    """Parse the first number in value and scale it to the base unit"""
+    if not value:
+        return None
+    match = pattern.search(value)
+    if not match:
+        return None
+    
+    number, unit = match.groups()
+    number = float(number)
+    if unit:
+        number *= units.get(unit.upper(), 1)
+    
+    return number
+
+# Catalogues repeat the same spec strings ("36V", "500W"), so normalized
+# values are memoized per string
+SPEC_CACHE_SIZE = 8192
+
+@lru_cache(maxsize=SPEC_CACHE_SIZE)
+def _power_w(value: str) -> Optional[float]:
+    return _scaled_value(value, _POWER_RE, _POWER_UNITS)
+
+@lru_cache(maxsize=SPEC_CACHE_SIZE)
+def _voltage_v(value: str) -> Optional[float]:
+    return _scaled_value(value, _VOLT_RE, _VOLT_UNITS)
+
+@lru_cache(maxsize=SPEC_CACHE_SIZE)
+def _dimension_mm(value: str) -> Optional[float]:
+    return _scaled_value(value, _DIM_RE, _DIM_UNITS)
+
 class SpecParser:
     """Handles parsing and normalization of technical specifications"""
     
     @staticmethod
     def normalize_power(value: str) -> Optional[float]:
         """Convert power specifications to watts"""
-        if not value:
-            return None
-        match = re.search(r'(\d+(?:\.\d+)?)\s*(W|KW|MW)?', value, re.IGNORECASE)
-        if not match:
-            return None
-        
-        number, unit = match.groups()
-        number = float(number)
-        
-        if unit:
-            unit = unit.upper()
-            if unit == 'KW':
-                number *= 1000
-            elif unit == 'MW':
-                number *= 1000000
-        
-        return number
+        return _power_w(value)
 
     @staticmethod
     def normalize_voltage(value: str) -> Optional[float]:
         """Convert voltage specifications to volts"""
-        if not value:
-            return None
-        match = re.search(r'(\d+(?:\.\d+)?)\s*(V|KV|MV)?', value, re.IGNORECASE)
-        if not match:
-            return None
-        
-        number, unit = match.groups()
-        number = float(number)
-        
-        if unit:
-            unit = unit.upper()
-            if unit == 'KV':
-                number *= 1000
-            elif unit == 'MV':
-                number *= 1000000
-        
-        return number
+        return _voltage_v(value)
 
     @staticmethod
     def extract_price_constraint(query: str) -> Optional[Dict]:
         """Extract price constraints from query"""
-        under_match = re.search(r'under\s*\$?\s*(\d+(?:\.\d+)?)', query, re.IGNORECASE)
-        over_match = re.search(r'over\s*\$?\s*(\d+(?:\.\d+)?)', query, re.IGNORECASE)
-        
+        # One scan finds both bounds; the first "under" and the first
+        # "over" win, as with separate searches
         constraints = {}
-        if under_match:
-            constraints['lte'] = float(under_match.group(1))
-        if over_match:
-            constraints['gte'] = float(over_match.group(1))
+        for match in _PRICE_RE.finditer(query):
+            bound = 'lte' if match.group('op').lower() == 'under' else 'gte'
+            constraints.setdefault(bound, float(match.group('n')))
             
         return constraints if constraints else None
 
     @staticmethod
     def normalize_dimensions(value: str) -> Optional[float]:
         """Convert dimensions to millimeters"""
-        if not value:
-            return None
-        match = re.search(r'(\d+(?:\.\d+)?)\s*(mm|cm|m|in)?', value, re.IGNORECASE)
-        if not match:
-            return None
-        
-        number, unit = match.groups()
-        number = float(number)
-        
-        if unit:
-            unit = unit.lower()
-            if unit == 'cm':
-                number *= 10
-            elif unit == 'm':
-                number *= 1000
-            elif unit == 'in':
-                number *= 25.4
-        
-        return number
+        return _dimension_mm(value)
+
+# Stock statuses indexed by the bucket calculate_stock_statuses assigns
+_STOCK_STATUSES = np.array(['critical', 'low', 'optimal', 'excess'])
 
 class InventoryAnalyzer:
     """Handles inventory status analysis"""
@@ -104,10 +140,21 @@ class InventoryAnalyzer:
             return 'optimal'
 
     @staticmethod
-    def enrich_inventory_data(part: Dict) -> Dict:
-        """Add inventory analysis to part data"""
-        stock_status = InventoryAnalyzer.calculate_stock_status(part)
-        
+    def calculate_stock_statuses(parts: List[Dict]) -> List[str]:
+        """Calculate the stock status of many parts in one vectorized pass"""
+        stock = np.fromiter((p['stock_level'] for p in parts), dtype=np.int64, count=len(parts))
+        reorder = np.fromiter((p['reorder_point'] for p in parts), dtype=np.int64, count=len(parts))
+        
+        bucket = np.where(
+            stock <= reorder, 0,
+            np.where(stock <= 2 * reorder, 1,
+                     np.where(stock >= 5 * reorder, 3, 2))
+        )
+        return _STOCK_STATUSES[bucket].tolist()
+
+    @staticmethod
+    def _with_inventory_metrics(part: Dict, stock_status: str) -> Dict:
+        """Return a copy of the part with its inventory metrics added"""
         enriched = part.copy()
         enriched['inventory_metrics'] = {
             'stock_status': stock_status,
@@ -117,22 +164,49 @@ class InventoryAnalyzer:
         
         return enriched
 
+    @staticmethod
+    def enrich_inventory_data(part: Dict) -> Dict:
+        """Add inventory analysis to part data"""
+        stock_status = InventoryAnalyzer.calculate_stock_status(part)
+        return InventoryAnalyzer._with_inventory_metrics(part, stock_status)
+
+    @staticmethod
+    def enrich_inventory_bulk(parts: List[Dict]) -> List[Dict]:
+        """Add inventory analysis to a batch of parts"""
+        statuses = InventoryAnalyzer.calculate_stock_statuses(parts)
+        return [
+            InventoryAnalyzer._with_inventory_metrics(part, status)
+            for part, status in zip(parts, statuses)
+        ]
+
 class EnhancedSparePartsSearch:
     def __init__(self, host='localhost', port=9200, index_name='spare_parts'):
+        options = {}
+        if orjson is not None:
+            options['serializer'] = ORJSONSerializer()
         self.client = OpenSearch(
             hosts=[{'host': host, 'port': port}],
             http_auth=None,
             use_ssl=False,
             verify_certs=False,
-            ssl_show_warn=False,
             scheme="http",
             timeout=30,
             max_retries=3,
             retry_on_timeout=True,
-            connection_class=RequestsHttpConnection
+            # urllib3 keeps a persistent pool with less per-request overhead
+            # than requests; searches and the bulk indexer thread share it
+            connection_class=Urllib3HttpConnection,
+            pool_maxsize=32,
+            **options
         )
         self.index_name = index_name
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Runs on CUDA when available unless MODEL_DEVICE says otherwise
+        self.model = SentenceTransformer('all-MiniLM-L6-v2', device=os.environ.get('MODEL_DEVICE'))
+        if self.model.device.type == 'cuda':
+            # FP16 halves weight traffic and uses the tensor cores
+            self.model.half()
+        # Repeated queries reuse their embedding instead of rerunning the model
+        self._cached_query_embedding = lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)(self._encode_query)
         self.spec_parser = SpecParser()
         self.inventory_analyzer = InventoryAnalyzer()
         self._create_index()
@@ -143,6 +217,9 @@ class EnhancedSparePartsSearch:
             self.client.indices.delete(index=self.index_name)
             
         mappings = {
+            "settings": {
+                "index": {"knn": True}
+            },
             "mappings": {
                 "properties": {
                     "part_number": {"type": "keyword"},
@@ -174,7 +251,23 @@ class EnhancedSparePartsSearch:
                     "retail_price": {"type": "float"},
                     "stock_level": {"type": "integer"},
                     "category": {"type": "keyword"},
-                    "embedding": {"type": "float"}
+                    "embedding": {
+                        "type": "knn_vector",
+                        "dimension": self.model.get_sentence_embedding_dimension(),
+                        "method": {
+                            "name": "hnsw",
+                            "space_type": "innerproduct",
+                            "engine": "faiss",
+                            # Store the graph's vectors as fp16; unit-length
+                            # embeddings lose no meaningful precision
+                            "parameters": {
+                                "encoder": {
+                                    "name": "sq",
+                                    "parameters": {"type": "fp16"}
+                                }
+                            }
+                        }
+                    }
                 }
             }
         }
@@ -199,126 +292,168 @@ class EnhancedSparePartsSearch:
 
     def index_parts(self, parts: List[Dict]):
         """Index parts with enhanced data"""
-        for part in parts:
+        # Embed one chunk while the previous chunk is being bulk indexed,
+        # so the model and the network overlap instead of taking turns
+        with ThreadPoolExecutor(max_workers=1) as indexer:
+            pending = None
+            for start in range(0, len(parts), INDEX_CHUNK_SIZE):
+                docs = self._embed_parts(parts[start:start + INDEX_CHUNK_SIZE])
+                if pending is not None:
+                    pending.result()
+                pending = indexer.submit(self._bulk_index, docs)
+            if pending is not None:
+                pending.result()
+        
+        # Refresh once at the end instead of once per part
+        self.client.indices.refresh(index=self.index_name)
+
+    def _embed_parts(self, parts: List[Dict]) -> List[Dict]:
+        """Build the indexed documents, with embeddings, for a chunk of parts"""
+        # Add inventory analysis for the whole chunk; this returns the only
+        # copies of the parts that are made, so the caller's dicts are left
+        # untouched
+        docs = self.inventory_analyzer.enrich_inventory_bulk(parts)
+        texts = []
+        for part in docs:
+            raw_specs = part['technical_specs']
+            
             # Normalize technical specs
             part['technical_specs'] = {
-                'raw': part['technical_specs'],
-                'normalized': self._normalize_specs(part['technical_specs'])
+                'raw': raw_specs,
+                'normalized': self._normalize_specs(raw_specs)
             }
             
-            # Add inventory analysis
-            part = self.inventory_analyzer.enrich_inventory_data(part)
-            
-            # Create rich text for embedding
-            specs_text = ' '.join([f"{k}: {v}" for k, v in part['technical_specs']['raw'].items()])
-            compatibility_text = ' '.join(part['compatibility'])
-            inventory_text = f"Stock status: {part['inventory_metrics']['stock_status']}"
-            
-            text_to_embed = f"{part['name']} {part['description']} {specs_text} {compatibility_text} {inventory_text} {part['category']}"
-            embedding = self.model.encode(text_to_embed)
-            
-            doc = part.copy()
-            doc['embedding'] = embedding.tolist()
-            
-            self.client.index(
-                index=self.index_name,
-                body=doc,
-                id=part['part_number'],
-                refresh=True
-            )
+            # Create rich text for embedding, joined once from all tokens
+            tokens = [part['name'], part['description']]
+            tokens.extend(f"{k}: {v}" for k, v in raw_specs.items())
+            tokens.extend(part['compatibility'])
+            tokens.append('Stock status:')
+            tokens.append(part['inventory_metrics']['stock_status'])
+            tokens.append(part['category'])
+            texts.append(' '.join(tokens))
+        
+        # Encode the whole chunk in one batched call
+        embeddings = self.model.encode(
+            texts,
+            batch_size=64,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        
+        # Embeddings stay ndarrays; the serializer writes them without
+        # boxing every float into a Python list first
+        for doc, embedding in zip(docs, embeddings):
+            doc['embedding'] = embedding
+        
+        return docs
+
+    def _bulk_index(self, docs: List[Dict]):
+        """Send documents to the index in bulk requests, without refreshing"""
+        actions = (
+            {"_index": self.index_name, "_id": doc['part_number'], "_source": doc}
+            for doc in docs
+        )
+        helpers.bulk(
+            self.client,
+            actions,
+            chunk_size=500,
+            max_chunk_bytes=100 * 1024 * 1024,
+            request_timeout=60
+        )
+
+    def _encode_query(self, query: str):
+        """Encode a query to a unit-length embedding"""
+        return self.model.encode(query, normalize_embeddings=True)
+
+    def _query_embedding(self, query: str):
+        """Return the query's embedding, cached on its normalized text"""
+        # The model is uncased, so case and surrounding whitespace don't
+        # change the embedding
+        return self._cached_query_embedding(query.strip().lower())
 
     def semantic_search(self, query: str, size: int = 5):
         """Enhanced semantic search with technical and inventory awareness"""
+        response = self.client.search(index=self.index_name, body=self._semantic_search_body(query, size))
+        return self._score_semantic_hits(query, response['hits']['hits'])
+
+    def _semantic_search_body(self, query: str, size: int) -> Dict:
+        """Build the kNN request for a semantic search"""
         # Extract price constraints
         price_constraints = self.spec_parser.extract_price_constraint(query)
         
         # Generate embedding for semantic search
-        query_embedding = self.model.encode(query)
-        
-        # Build search query
-        body = {
-            "query": {
-                "bool": {
-                    "must": [{"match_all": {}}]
-                }
-            },
-            "_source": True,
-            "size": 100
+        query_embedding = self._query_embedding(query)
+        
+        # Let OpenSearch find the nearest parts with its HNSW index; extra
+        # neighbours give the inventory boost room to reorder the top hits
+        candidates = size * KNN_CANDIDATE_FACTOR
+        knn = {
+            "vector": query_embedding.tolist(),
+            "k": candidates
         }
         
-        # Add price filter if present
+        # Add price filter if present; it is applied during the graph
+        # search so filtered-out parts don't use up the k neighbours
         if price_constraints:
-            body["query"]["bool"]["filter"] = [
-                {"range": {"retail_price": price_constraints}}
-            ]
+            knn["filter"] = {"range": {"retail_price": price_constraints}}
         
-        # Execute search
-        response = self.client.search(index=self.index_name, body=body)
-        hits = response['hits']['hits']
+        knn_query = {"knn": {"embedding": knn}}
         
-        # Score results using embeddings and boost based on inventory status
-        scored_hits = []
+        # Apply the inventory status boost on the shards, so only the
+        # final top results come back
+        if self._boosts_inventory(query):
+            knn_query = {
+                "function_score": {
+                    "query": knn_query,
+                    "functions": [
+                        {
+                            "filter": {"term": {"inventory_metrics.stock_status": status}},
+                            "weight": weight
+                        }
+                        for status, weight in INVENTORY_BOOSTS.items()
+                    ],
+                    "score_mode": "multiply",
+                    "boost_mode": "multiply"
+                }
+            }
+        
+        return {
+            "query": knn_query,
+            "_source": _RESULT_SOURCE,
+            "size": size
+        }
+
+    @staticmethod
+    def _boosts_inventory(query: str) -> bool:
+        """Whether the query asks about stock, so inventory status should boost"""
+        query = query.lower()
+        return 'stock' in query or 'inventory' in query
+
+    def _score_semantic_hits(self, query: str, hits: List[Dict]) -> List[Dict]:
+        """Replace the kNN scores with boosted cosine similarities for display"""
+        boosted = self._boosts_inventory(query)
         for hit in hits:
-            doc = hit['_source']
-            
-            # Calculate semantic similarity
-            similarity = np.dot(query_embedding, doc['embedding'])
-            
-            # Apply inventory status boost
             inventory_boost = 1.0
-            if 'stock' in query.lower() or 'inventory' in query.lower():
-                status = doc['inventory_metrics']['stock_status']
-                if status == 'optimal':
-                    inventory_boost = 1.2
-                elif status == 'excess':
-                    inventory_boost = 0.8
-                elif status == 'critical':
-                    inventory_boost = 0.6
+            if boosted:
+                status = hit['_source']['inventory_metrics']['stock_status']
+                inventory_boost = INVENTORY_BOOSTS.get(status, 1.0)
             
-            # Calculate final score
+            # Embeddings are unit length, so the dot product is the cosine
+            similarity = knn_score_to_similarity(hit['_score'] / inventory_boost)
             hit['_score'] = float(similarity * inventory_boost)
-            scored_hits.append(hit)
         
-        # Sort by score and return top results
-        scored_hits.sort(key=lambda x: x['_score'], reverse=True)
-        return scored_hits[:size]
+        return hits
 
-    def compare_searches(self, query: str, explanation: str):
-        """Compare standard and semantic search results with enhanced metrics"""
-        print(f"\n{'='*100}")
-        print(f"Use Case: {explanation}")
-        print(f"Query: '{query}'")
-        print(f"{'='*100}")
-        
-        semantic_results = self.semantic_search(query)
-        
-        # Enhanced results format with inventory status
-        def format_results(results):
-            rows = []
-            for i, hit in enumerate(results, 1):
-                source = hit['_source']
-                score = hit['_score']
-                rows.append([
-                    i,
-                    source['part_number'],
-                    source['name'],
-                    f"${source['retail_price']:,.2f}",
-                    source['stock_level'],
-                    source['inventory_metrics']['stock_status'],
-                    f"{score:.2f}"
-                ])
-            
-            print("\nEnhanced Search Results:")
-            print(tabulate(
-                rows,
-                headers=['Rank', 'Part #', 'Name', 'Price', 'Stock', 'Status', 'Score'],
-                tablefmt='grid'
-            ))
-        
-        format_results(semantic_results)
     def standard_search(self, query: str, size: int = 5):
         """Standard keyword-based search with fuzzy matching"""
-        body = {
+        response = self.client.search(index=self.index_name, body=self._standard_search_body(query, size))
+        return response['hits']['hits']
+
+    def _standard_search_body(self, query: str, size: int) -> Dict:
+        """Build the keyword request for a standard search"""
+        return {
+            "size": size,
+            "_source": _RESULT_SOURCE,
             "query": {
                 "bool": {
                     "should": [
@@ -348,19 +483,33 @@ class EnhancedSparePartsSearch:
                 }
             }
         }
-        
-        response = self.client.search(index=self.index_name, body=body, size=size)
+
+    @staticmethod
+    def _msearch_hits(response: Dict) -> List[Dict]:
+        """Return the hits of one msearch response, raising if that search failed"""
+        # msearch reports each search's failure inside its own response
+        # rather than failing the request, so surface it like a search error
+        error = response.get('error')
+        if error:
+            error_type = error.get('type', 'unknown') if isinstance(error, dict) else str(error)
+            raise TransportError(response.get('status', 'N/A'), error_type, error)
         return response['hits']['hits']
 
-    def compare_searches(self, query: str, explanation: str):
+    def compare_searches(self, query: str, explanation: str, size: int = 5):
         """Compare standard and semantic search results with enhanced metrics"""
         print(f"\n{'='*100}")
         print(f"Use Case: {explanation}")
         print(f"Query: '{query}'")
         print(f"{'='*100}")
         
-        standard_results = self.standard_search(query)
-        semantic_results = self.semantic_search(query)
+        # Run both searches in a single msearch round-trip
+        header = {"index": self.index_name}
+        standard_response, semantic_response = self.client.msearch(body=[
+            header, self._standard_search_body(query, size),
+            header, self._semantic_search_body(query, size)
+        ])['responses']
+        standard_results = self._msearch_hits(standard_response)
+        semantic_results = self._score_semantic_hits(query, self._msearch_hits(semantic_response))
         
         def format_results(results, search_type):
             rows = []
@@ -622,23 +771,20 @@ def run_enhanced_demo(example_queries):
     # Initialize search
     search = EnhancedSparePartsSearch()
     print("Indexing enhanced spare parts...")
+    # index_parts refreshes the index, so results are searchable already
     search.index_parts(test_data)
-    time.sleep(1)
     
     # Run test queries
     for query, explanation in example_queries:
         search.compare_searches(query, explanation)
-        time.sleep(0.5)
 
 def run_comparison_demo(example_queries):
     search = EnhancedSparePartsSearch()
     print("Indexing spare parts...")
     search.index_parts(test_data)
-    time.sleep(1)
     
     for query, explanation in example_queries:
         search.compare_searches(query, explanation)
-        time.sleep(0.5)
 # Example usage
 if __name__ == "__main__":
     # Enhanced test data with more technical specifications
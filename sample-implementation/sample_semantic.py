@@ -1,13 +1,126 @@
 from opensearchpy import OpenSearch, helpers, ConnectionTimeout, RequestError, TransportError, NotFoundError
-from opensearchpy.connection import RequestsHttpConnection
-from typing import List, Dict, Any, Optional
-from datetime import datetime
-import json
-import time
+from opensearchpy.connection import Urllib3HttpConnection
+from opensearchpy.serializer import JSONSerializer
+from typing import List, Dict, Any, Iterator, Optional
+from datetime import datetime, timezone
+from functools import lru_cache
+import logging
 import spacy
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-import cachetools
+from spacy.attrs import IS_STOP, IS_PUNCT, LEMMA
+
+logger = logging.getLogger(__name__)
+# Applications configure handlers; the module stays silent by default
+logger.addHandler(logging.NullHandler())
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the stdlib serializer
+    orjson = None
+
+# Token attributes read in one call when extracting tokens: the stop and
+# punctuation flags to filter on and the lemma to keep
+_TOKEN_ATTRS = [IS_STOP, IS_PUNCT, LEMMA]
+
+# Index settings for serving searches, and the ones bulk_load swaps in
+# while it writes: no periodic refreshes and no replica copies
+SEARCH_SETTINGS = {"index": {"refresh_interval": "30s", "number_of_replicas": 1}}
+BULK_LOAD_SETTINGS = {"index": {"refresh_interval": "-1", "number_of_replicas": 0}}
+
+# Parts of the search request that never change, shared by every body
+# instead of being rebuilt per search
+_MULTI_MATCH_FIELDS = [
+    "name^3",
+    "description^2",
+    "category",
+    "manufacturer.name"
+]
+# Fields returned with each hit; the long tokens string stays on the server
+_RESULT_FIELDS = ["sku", "name", "category", "unit_price", "quantity"]
+_HIGHLIGHT = {
+    "fields": {
+        "name": {},
+        "description": {},
+        "tokens": {}
+    }
+}
+
+# Upsert for existing items: copies over the fields that changed and only
+# then bumps last_updated; an unchanged item becomes a noop, so reloading
+# the same inventory rewrites nothing
+_UPSERT_SCRIPT = """
+boolean changed = false;
+for (def entry : params.doc.entrySet()) {
+    if (!Objects.equals(ctx._source[entry.getKey()], entry.getValue())) {
+        ctx._source[entry.getKey()] = entry.getValue();
+        changed = true;
+    }
+}
+if (changed) {
+    ctx._source.last_updated = params.now;
+} else {
+    ctx.op = 'noop';
+}
+"""
+
+# Queries with fewer terms than this are matched without fuzziness
+FUZZY_MIN_TERMS = 3
+
+# Concurrent bulk requests during indexing
+BULK_THREAD_COUNT = 4
+
+# Processed query strings kept per search instance
+TOKENIZE_CACHE_SIZE = 8192
+
+class ORJSONSerializer(JSONSerializer):
+    """JSON serializer backed by orjson for faster request/response encoding"""
+
+    def dumps(self, data) -> str:
+        if isinstance(data, str):
+            return data
+        # The bulk helpers measure chunks with str.encode, so hand back
+        # text rather than orjson's bytes
+        return orjson.dumps(data, default=self.default).decode()
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+_CLIENTS: Dict[tuple, OpenSearch] = {}
+
+def _get_client(host: str, port: int, http_auth: Optional[tuple], timeout: int) -> OpenSearch:
+    """Return the process-wide client for a cluster, creating it on first use"""
+    key = (host, port, http_auth, timeout)
+    client = _CLIENTS.get(key)
+    if client is None:
+        options = {}
+        if orjson is not None:
+            options['serializer'] = ORJSONSerializer()
+        client = OpenSearch(
+            hosts=[{'host': host, 'port': port}],
+            http_auth=http_auth,
+            use_ssl=False,
+            verify_certs=False,
+            scheme="http",
+            timeout=timeout,
+            max_retries=3,
+            retry_on_timeout=True,
+            # Pooled so every bulk thread gets its own connection
+            connection_class=Urllib3HttpConnection,
+            pool_maxsize=BULK_THREAD_COUNT * 2,
+            **options
+        )
+        _CLIENTS[key] = client
+    return client
+
+@lru_cache(maxsize=1)
+def _get_nlp():
+    """Load the spaCy pipeline once per process, on first use"""
+    # Only lemmas and stop/punct flags are used: the small model skips
+    # the unused word vectors, and the parser and NER are never loaded.
+    # The tagger stays because the lemmatizer's rules need its POS tags.
+    return spacy.load(
+        "en_core_web_sm",
+        exclude=["parser", "senter", "ner", "textcat"]
+    )
 
 class OptimizedInventorySearch:
     def __init__(
@@ -19,36 +132,26 @@ class OptimizedInventorySearch:
         timeout: int = 30
     ):
         try:
-            self.client = OpenSearch(
-                hosts=[{'host': host, 'port': port}],
-                http_auth=http_auth,
-                use_ssl=False,
-                verify_certs=False,
-                ssl_show_warn=False,
-                scheme="http",
-                timeout=timeout,
-                max_retries=3,
-                retry_on_timeout=True,
-                connection_class=RequestsHttpConnection
-            )
+            self.client = _get_client(host, port, http_auth, timeout)
             
             self.client.info()
-            print("Successfully connected to OpenSearch")
+            logger.info("Successfully connected to OpenSearch")
             
         except ConnectionError as e:
-            print(f"Failed to connect to OpenSearch: {e}")
+            logger.error("Failed to connect to OpenSearch: %s", e)
             raise
         
         self.index_name = index_name
-        self.nlp = spacy.load("en_core_web_lg", disable=['parser', 'textcat'])
-        self.vectorizer = TfidfVectorizer(
-            ngram_range=(1, 2),
-            max_features=10000,
-            stop_words='english'
-        )
+        # Repeated queries reuse their tokens instead of rerunning the pipeline
+        self._cached_tokenize = lru_cache(maxsize=TOKENIZE_CACHE_SIZE)(self._tokenize)
         
         self._ensure_index_exists()
 
+    @property
+    def nlp(self):
+        """The shared spaCy pipeline, loaded on first use"""
+        return _get_nlp()
+
     def _ensure_index_exists(self):
         """Ensure index exists with proper settings"""
         try:
@@ -57,8 +160,8 @@ class OptimizedInventorySearch:
                     "settings": {
                         "index": {
                             "number_of_shards": 3,
-                            "number_of_replicas": 1,
-                            "refresh_interval": "5s",
+                            "number_of_replicas": SEARCH_SETTINGS["index"]["number_of_replicas"],
+                            "refresh_interval": SEARCH_SETTINGS["index"]["refresh_interval"],
                             "analysis": {
                                 "analyzer": {
                                     "custom_analyzer": {
@@ -117,122 +220,293 @@ class OptimizedInventorySearch:
                     index=self.index_name,
                     body=settings
                 )
-                print(f"Created index: {self.index_name}")
+                logger.info("Created index: %s", self.index_name)
                 
         except Exception as e:
-            print(f"Error ensuring index exists: {e}")
+            logger.error("Error ensuring index exists: %s", e)
             raise
 
-    def index_item(self, item: Dict) -> Dict:
-        """Index a single inventory item"""
+    @staticmethod
+    def _doc_tokens(doc) -> str:
+        """Join the lowercased lemmas of a processed text, minus stopwords and punctuation"""
+        # Filter the whole doc on one attribute array instead of reading
+        # each token's flags from Python
+        attrs = doc.to_array(_TOKEN_ATTRS)
+        keep = (attrs[:, 0] | attrs[:, 1]) == 0
+        strings = doc.vocab.strings
+        tokens = [strings[lemma].lower() for lemma in attrs[keep, 2].tolist()]
+        return ' '.join(tokens)
+
+    def _tokenize(self, text: str) -> str:
+        """Process a single text into its joined lemma tokens"""
+        return self._doc_tokens(self.nlp(text))
+
+    def _enrich(self, item: Dict, doc) -> Dict:
+        """Add the processed tokens to an inventory item"""
+        return {
+            **item,
+            'tokens': self._doc_tokens(doc)
+        }
+
+    def _actions(self, items: List[Dict]):
+        """Yield bulk upsert actions for inventory items"""
+        # Process the item texts in batches instead of one nlp call each
+        texts = [f"{item['name']} {item.get('description', '')}" for item in items]
+        # One timestamp for the whole load; OpenSearch reads naive times as
+        # UTC, so it is taken in UTC
+        last_updated = datetime.now(timezone.utc).isoformat()
+        for item, doc in zip(items, self.nlp.pipe(texts, batch_size=64)):
+            yield {
+                "_op_type": "update",
+                "_index": self.index_name,
+                "_id": item['sku'],
+                **self._upsert_body(self._enrich(item, doc), last_updated)
+            }
+
+    @staticmethod
+    def _upsert_body(enriched: Dict, last_updated: str) -> Dict:
+        """Build the scripted upsert for an enriched inventory item"""
+        return {
+            "script": {
+                "source": _UPSERT_SCRIPT,
+                "lang": "painless",
+                "params": {"doc": enriched, "now": last_updated}
+            },
+            "upsert": {**enriched, 'last_updated': last_updated}
+        }
+
+    def index_items(self, items: List[Dict], refresh: bool = True) -> Dict:
+        """
+        Index inventory items in bulk requests
+
+        With refresh, the index is refreshed once at the end so the items
+        are searchable on return; pass False when more loads follow.
+        """
         try:
-            # Generate tokens and process text
-            text_to_analyze = f"{item['name']} {item.get('description', '')}"
-            doc = self.nlp(text_to_analyze)
+            # Several bulk requests in flight keep all shards indexing
+            success, errors = 0, []
+            for ok, info in helpers.parallel_bulk(
+                self.client,
+                self._actions(items),
+                thread_count=BULK_THREAD_COUNT,
+                chunk_size=500,
+                max_chunk_bytes=10 * 1024 * 1024,
+                raise_on_error=False,
+                request_timeout=60
+            ):
+                if ok:
+                    success += 1
+                else:
+                    errors.append(info)
+            if refresh:
+                self.client.indices.refresh(index=self.index_name)
+            logger.info("Successfully indexed %d items", success)
+            if errors:
+                logger.warning("Failed to index %d items", len(errors))
+                # Per-item details are only formatted when debugging
+                if logger.isEnabledFor(logging.DEBUG):
+                    for error in errors:
+                        logger.debug("Bulk indexing error: %s", error)
+            return {"indexed": success, "errors": errors}
+            
+        except Exception as e:
+            logger.error("Error indexing items: %s", e)
+            return {"error": str(e)}
+
+    def bulk_load(self, items: List[Dict], force_merge: bool = False) -> Dict:
+        """
+        Index a large batch of items with refreshes and replicas paused
+
+        force_merge merges the index down to one segment afterwards. That
+        is slow and blocking, and only pays off for a full initial load of
+        an index that is then only read.
+        """
+        try:
+            self.client.indices.put_settings(index=self.index_name, body=BULK_LOAD_SETTINGS)
+            try:
+                result = self.index_items(items)
+            finally:
+                self.client.indices.put_settings(index=self.index_name, body=SEARCH_SETTINGS)
             
-            # Extract key terms and lemmas
-            tokens = [token.lemma_.lower() for token in doc 
-                     if not token.is_stop and not token.is_punct]
+            if force_merge:
+                self.client.indices.forcemerge(
+                    index=self.index_name,
+                    max_num_segments=1,
+                    request_timeout=300
+                )
+            return result
             
-            # Add processed data
-            indexed_item = {
-                **item,
-                'tokens': ' '.join(tokens),
-                'last_updated': datetime.now().isoformat()
-            }
+        except Exception as e:
+            logger.error("Error bulk loading items: %s", e)
+            return {"error": str(e)}
+
+    def index_item(self, item: Dict, refresh: bool = True) -> Dict:
+        """
+        Index a single inventory item, returning the update response
+
+        With refresh, the item is searchable on return; pass False when
+        indexing many items one at a time and refresh once afterwards.
+        """
+        try:
+            text_to_analyze = f"{item['name']} {item.get('description', '')}"
+            enriched = self._enrich(item, self.nlp(text_to_analyze))
+            last_updated = datetime.now(timezone.utc).isoformat()
             
-            response = self.client.index(
+            return self.client.update(
                 index=self.index_name,
-                body=indexed_item,
                 id=item['sku'],
-                refresh=True
+                body=self._upsert_body(enriched, last_updated),
+                refresh=refresh
             )
-            print(f"Successfully indexed item {item['sku']}")
-            return response
             
         except Exception as e:
-            print(f"Error indexing item {item.get('sku', 'unknown')}: {e}")
+            logger.error("Error indexing item %s: %s", item.get('sku', 'unknown'), e)
             return {"error": str(e)}
 
+    def _search_body(
+        self,
+        query: str,
+        processed_query: str,
+        use_semantic: bool,
+        size: int,
+        highlight: bool
+    ) -> Dict[str, Any]:
+        """Build the search request for a query and its processed tokens"""
+        multi_match = {
+            "query": query,
+            "fields": _MULTI_MATCH_FIELDS,
+            "type": "best_fields",
+            "boost": 2.0
+        }
+        # Fuzzy expansion costs an automaton walk per term; short keyword
+        # queries like "ThinkPad laptop" match exactly without it
+        if len(query.split()) >= FUZZY_MIN_TERMS:
+            multi_match["fuzziness"] = "AUTO"
+        
+        search_body = {
+            "size": size,
+            "_source": _RESULT_FIELDS,
+            "query": {
+                "bool": {
+                    "should": [
+                        {"multi_match": multi_match},
+                        {
+                            "match": {
+                                "tokens": {
+                                    "query": processed_query,
+                                    "boost": 1.5 if use_semantic else 0.5
+                                }
+                            }
+                        }
+                    ],
+                    "minimum_should_match": 1
+                }
+            }
+        }
+        
+        # Highlighting re-analyzes the matched fields of every hit, so it
+        # is only requested by callers that show the matches
+        if highlight:
+            search_body["highlight"] = _HIGHLIGHT
+        
+        return search_body
+
+    @staticmethod
+    def _format_results(response: Dict) -> Dict[str, Any]:
+        """Flatten a search response into its total and scored items"""
+        return {
+            "total": response["hits"]["total"]["value"],
+            "items": [
+                {**hit["_source"], "_score": hit["_score"], "highlights": hit.get("highlight", {})}
+                for hit in response["hits"]["hits"]
+            ]
+        }
+
     def search_inventory(
         self,
         query: str,
         use_semantic: bool = True,
-        size: int = 10
+        size: int = 10,
+        highlight: bool = False
     ) -> Dict[str, Any]:
         """Search inventory items"""
         try:
             # Process query
-            doc = self.nlp(query)
-            tokens = [token.lemma_.lower() for token in doc 
-                     if not token.is_stop and not token.is_punct]
-            processed_query = ' '.join(tokens)
-            
-            # Build search query
-            search_body = {
-                "size": size,
-                "query": {
-                    "bool": {
-                        "should": [
-                            {
-                                "multi_match": {
-                                    "query": query,
-                                    "fields": [
-                                        "name^3",
-                                        "description^2",
-                                        "category",
-                                        "manufacturer.name"
-                                    ],
-                                    "type": "best_fields",
-                                    "fuzziness": "AUTO",
-                                    "boost": 2.0
-                                }
-                            },
-                            {
-                                "match": {
-                                    "tokens": {
-                                        "query": processed_query,
-                                        "boost": use_semantic and 1.5 or 0.5
-                                    }
-                                }
-                            }
-                        ],
-                        "minimum_should_match": 1
-                    }
-                },
-                "highlight": {
-                    "fields": {
-                        "name": {},
-                        "description": {},
-                        "tokens": {}
-                    }
-                }
-            }
+            processed_query = self._cached_tokenize(query)
             
             # Execute search
             response = self.client.search(
                 index=self.index_name,
-                body=search_body,
+                body=self._search_body(query, processed_query, use_semantic, size, highlight),
                 request_timeout=30
             )
             
-            # Process results
-            results = {
-                "total": response["hits"]["total"]["value"],
-                "items": []
-            }
+            return self._format_results(response)
+            
+        except Exception as e:
+            logger.error("Search error: %s", e)
+            return {"error": str(e), "total": 0, "items": []}
+
+    def iter_search(
+        self,
+        query: str,
+        use_semantic: bool = True,
+        page_size: int = 500
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield every inventory item matching a query, a page at a time"""
+        search_body = self._search_body(
+            query, self._cached_tokenize(query), use_semantic, page_size, highlight=False
+        )
+        # Scrolls in score order, so large result sets stream by relevance
+        # without being held in memory
+        for hit in helpers.scan(
+            self.client,
+            query=search_body,
+            index=self.index_name,
+            size=page_size,
+            preserve_order=True,
+            request_timeout=30
+        ):
+            yield {**hit["_source"], "_score": hit["_score"]}
+
+    def search_many(
+        self,
+        queries: List[str],
+        use_semantic: bool = True,
+        size: int = 10,
+        highlight: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Search inventory items for several queries in one msearch request"""
+        try:
+            # Process all queries in one batch
+            body = []
+            for query, doc in zip(queries, self.nlp.pipe(queries, batch_size=16)):
+                body.append({})
+                body.append(
+                    self._search_body(query, self._doc_tokens(doc), use_semantic, size, highlight)
+                )
             
-            for hit in response["hits"]["hits"]:
-                item = hit["_source"]
-                item["_score"] = hit["_score"]
-                item["highlights"] = hit.get("highlight", {})
-                results["items"].append(item)
+            response = self.client.msearch(
+                index=self.index_name,
+                body=body,
+                request_timeout=30
+            )
+            
+            # Each query can fail on its own without failing the batch
+            results = []
+            for query_response in response["responses"]:
+                if "error" in query_response:
+                    error = str(query_response["error"])
+                    logger.error("Search error: %s", error)
+                    results.append({"error": error, "total": 0, "items": []})
+                else:
+                    results.append(self._format_results(query_response))
             
             return results
             
         except Exception as e:
-            print(f"Search error: {str(e)}")
-            return {"error": str(e), "total": 0, "items": []}
+            logger.error("Search error: %s", e)
+            return [{"error": str(e), "total": 0, "items": []} for _ in queries]
 
 # Sample test data
 SAMPLE_INVENTORY = [
@@ -275,13 +549,12 @@ def test_search_system():
         search_system = OptimizedInventorySearch(timeout=30)
         
         print("\nIndexing sample data...")
-        for item in SAMPLE_INVENTORY:
-            result = search_system.index_item(item)
-            if "error" in result:
-                print(f"Failed to index {item['sku']}: {result['error']}")
-        
-        # Wait for indexing to complete
-        time.sleep(2)
+        # A full initial load, searched read-only afterwards
+        result = search_system.bulk_load(SAMPLE_INVENTORY, force_merge=True)
+        if "error" in result:
+            print(f"Failed to index sample data: {result['error']}")
+        for error in result.get("errors", []):
+            print(f"Failed to index item: {error}")
         
         print("\nRunning test queries...")
         test_queries = [
@@ -292,12 +565,16 @@ def test_search_system():
             "laptop with 16GB RAM"
         ]
         
-        for query in test_queries:
+        # Run each mode's queries as one batch
+        standard_results = search_system.search_many(test_queries, use_semantic=False, highlight=True)
+        semantic_results = search_system.search_many(test_queries, use_semantic=True, highlight=True)
+        
+        for query, standard, semantic in zip(test_queries, standard_results, semantic_results):
             print(f"\nTesting query: {query}")
             
             # Test without semantic search
             print("Standard search:")
-            results = search_system.search_inventory(query, use_semantic=False)
+            results = standard
             if "error" in results:
                 print(f"Error: {results['error']}")
             else:
@@ -309,7 +586,7 @@ def test_search_system():
             
             # Test with semantic search
             print("\nSemantic search:")
-            results = search_system.search_inventory(query, use_semantic=True)
+            results = semantic
             if "error" in results:
                 print(f"Error: {results['error']}")
             else:
@@ -324,4 +601,5 @@ def test_search_system():
         raise
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     test_search_system()
\ No newline at end of file
@@ -1,32 +1,38 @@
-from opensearchpy import OpenSearch
+from opensearchpy import OpenSearch, helpers
 import json
 
-# Initialize the client
-client = OpenSearch(
-    hosts=[{'host': 'localhost', 'port': 9200}],
-    use_ssl=False,
-    verify_certs=False,
-    ssl_show_warn=False,
-    scheme="http"
-)
+# Keeps the whole hits object: scan reads hits.hits on every page, and a
+# narrower path lets the server drop it from an empty page
+SCAN_FILTER_PATH = "_scroll_id,_shards,hits"
 
-# Get all documents in the inventory index
-search_query = {
-    "query": {
-        "match_all": {}
-    },
-    "size": 100
-}
+def scan_documents(client: OpenSearch, index: str):
+    """Stream every document in an index, a page at a time"""
+    # Scroll pages are left unfiltered, so the empty page that ends the
+    # scan always carries its hits list
+    return helpers.scan(
+        client,
+        index=index,
+        query={"query": {"match_all": {}}},
+        size=500,
+        request_timeout=60,
+        filter_path=SCAN_FILTER_PATH
+    )
 
-response = client.search(
-    body=search_query,
-    index='inventory'
-)
+if __name__ == "__main__":
+    # Initialize the client
+    client = OpenSearch(
+        hosts=[{'host': 'localhost', 'port': 9200}],
+        use_ssl=False,
+        verify_certs=False,
+        ssl_show_warn=False,
+        scheme="http"
+    )
 
-print("All Documents in Index:")
-print(json.dumps(response['hits']['hits'], indent=2))
+    print("All Documents in Index:")
+    for hit in scan_documents(client, 'inventory'):
+        print(json.dumps(hit, indent=2))
 
-# Check the mapping of the index
-mapping = client.indices.get_mapping(index='inventory')
-print("\nIndex Mapping:")
-print(json.dumps(mapping, indent=2))
\ No newline at end of file
+    # Check the mapping of the index
+    mapping = client.indices.get_mapping(index='inventory')
+    print("\nIndex Mapping:")
+    print(json.dumps(mapping, indent=2))
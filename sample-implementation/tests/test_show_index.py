@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("opensearchpy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from show_index import SCAN_FILTER_PATH, scan_documents
+
+_SHARDS = {"total": 1, "successful": 1, "skipped": 0, "failed": 0}
+
+class FakeClient:
+    """Answers scan's search/scroll calls the way a filtered server would"""
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.filter_paths = []
+
+    def _page(self, filter_path):
+        self.filter_paths.append(filter_path)
+        hits = self.pages.pop(0) if self.pages else []
+        return {"_scroll_id": "scroll-1", "_shards": _SHARDS, "hits": {"hits": hits}}
+
+    def search(self, body=None, filter_path=None, **kwargs):
+        return self._page(filter_path)
+
+    def scroll(self, body=None, filter_path=None, **kwargs):
+        return self._page(filter_path)
+
+    def clear_scroll(self, **kwargs):
+        return {}
+
+def test_scan_empty_index():
+    client = FakeClient([])
+    assert list(scan_documents(client, "inventory")) == []
+    assert client.filter_paths == [SCAN_FILTER_PATH]
+
+def test_scan_pages_until_empty_page():
+    docs = [{"_id": str(i), "_source": {"sku": f"SKU{i}"}} for i in range(3)]
+    client = FakeClient([docs[:2], docs[2:]])
+    assert list(scan_documents(client, "inventory")) == docs
+    # Only the initial search is filtered; scroll pages arrive unfiltered
+    assert client.filter_paths == [SCAN_FILTER_PATH, None, None]